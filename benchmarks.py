@@ -0,0 +1,566 @@
+"""Metric-kernel benchmarks: wall time and memory of every metric function at several data sizes
+
+    python benchmarks.py                                  # every kernel at its default sizes
+    python benchmarks.py quantile_loss dice_coefficient --sizes 1000 1000000
+    python benchmarks.py --save bench_baseline.json       # record a baseline
+    python benchmarks.py --compare bench_baseline.json    # flag slowdowns, exit 1 if any
+    python benchmarks.py bleu_score --profile             # cProfile hot spots
+    python benchmarks.py bleu_score --lines               # per-line times in project code
+
+Each kernel is timed over repeated calls after a warm-up call, with the
+garbage collector paused as timeit does. Memory is measured in a
+separate call under tracemalloc, which would otherwise slow the timed
+calls down. tracemalloc reports the peak and what is still allocated
+when the call returns; it cannot count allocation events, so
+"blocks" is the number of memory blocks the call left behind.
+"""
+import argparse
+import cProfile
+import gc
+import io
+import json
+import linecache
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from main import ROOT, load_module
+
+THRESHOLD = 1.25            # flag kernels this many times slower (or hungrier) than the baseline
+MIN_DELTA_MS = 0.05         # ...and at least this much slower, so timer noise on tiny calls is ignored
+MIN_DELTA_KIB = 64          # peak memory growth below this is not flagged
+
+
+# --- Kernels: setup(size, rng) -> (fn, calls, items) -----------------------------------------------
+# One benchmark call runs fn(*args) for each args in calls. `items` is how many elements that
+# call really covers (boxes, pixels, values, rows, ...), which can differ slightly from `size`
+# when a kernel needs whole images, series or square blocks.
+
+def _words(rng, n_sentences, length=20, vocab_size=1_000):
+    vocab = np.array([f"w{i}" for i in range(vocab_size)])
+    return vocab[rng.integers(0, vocab_size, (n_sentences, length))].tolist()
+
+
+def _forecast_pair(rng, size):
+    time_ = np.arange(size)
+    y_true = 50 + 10 * np.sin(2 * np.pi * time_ / 7) + rng.standard_normal(size) * 2
+    return y_true, y_true + rng.standard_normal(size) * 3
+
+
+def _random_boxes(rng, n):
+    xy = rng.uniform(0, 500, (n, 2))
+    return np.hstack([xy, xy + rng.uniform(10, 100, (n, 2))])
+
+
+def _labels_and_scores(rng, size):
+    y_true = rng.integers(0, 2, size)
+    return y_true, np.clip(0.3 * y_true + rng.random(size), 0, 1)
+
+
+# computer vision
+
+def setup_iou(size, rng):
+    boxes = [_random_boxes(rng, size).tolist() for _ in range(2)]
+    return load_module("computer_vision", "example").calculate_iou, list(zip(*boxes)), size
+
+
+def setup_pairwise_iou(size, rng):
+    n = max(1, int(np.sqrt(size)))
+    boxes = _random_boxes(rng, 2 * n)
+    return load_module("computer_vision", "boxes").pairwise_iou, [(boxes[:n], boxes[n:])], n * n
+
+
+def _evaluate_detections(images):
+    evaluator = load_module("computer_vision", "detection").DetectionEvaluator()
+    evaluator.update_batch(images)
+    return evaluator.compute()
+
+
+def setup_detection(size, rng):
+    images = list(load_module("computer_vision", "detection").mock_detections(size, seed=int(rng.integers(1 << 31))))
+    return _evaluate_detections, [(images,)], size
+
+
+def _masks(rng, size, num_classes=2):
+    return rng.integers(0, num_classes, (2, size))
+
+
+def setup_dice(size, rng):
+    return load_module("computer_vision", "example").dice_coefficient, [tuple(_masks(rng, size))], size
+
+
+def setup_confusion_matrix(size, rng):
+    pred, true = _masks(rng, size, num_classes=4)
+    return load_module("computer_vision", "segmentation").confusion_matrix, [(pred, true, 4)], size
+
+
+def setup_image_quality(size, rng):
+    side = max(11, int(np.sqrt(size / 8)))          # a batch of 8 grayscale images, SSIM needs 11×11
+    target = rng.random((8, side, side))
+    pred = np.clip(target + rng.normal(0, 0.05, target.shape), 0, 1)
+    return load_module("computer_vision", "image_quality").image_quality, [(pred, target)], target.size
+
+
+# nlp
+
+def setup_bleu(size, rng):
+    pairs = zip(_words(rng, size), _words(rng, size))
+    return load_module("nlp", "example").bleu_score, [(ref, cand, 4) for ref, cand in pairs], size
+
+
+def setup_rouge(size, rng):
+    pairs = zip(_words(rng, size), _words(rng, size))
+    return load_module("nlp", "example").rouge_n, [(ref, cand, 2) for ref, cand in pairs], size
+
+
+def _corpus_score(references, candidates):
+    return load_module("nlp", "corpus_metrics").CorpusScorer(references).score(candidates)
+
+
+def setup_corpus_scorer(size, rng):
+    corpus = load_module("nlp", "corpus_metrics").mock_corpus(size, seed=int(rng.integers(1 << 31)))
+    return _corpus_score, [corpus], size
+
+
+def setup_perplexity(size, rng):
+    return load_module("nlp", "example").perplexity, [(rng.uniform(0.01, 1.0, size),)], size
+
+
+def _stream_perplexity(log_probs):
+    return load_module("nlp", "streaming_perplexity").PerplexityAccumulator().update(log_probs).perplexity
+
+
+def setup_perplexity_accumulator(size, rng):
+    return _stream_perplexity, [(np.log(rng.uniform(0.01, 1.0, size)).astype(np.float32),)], size
+
+
+def setup_embedding_search(size, rng):
+    index = load_module("nlp", "embedding_search").EmbeddingIndex.build(rng.standard_normal((size, 64)))
+    return index.search, [(rng.standard_normal((256, 64)), 10)], size     # 256 queries against `size` rows
+
+
+# forecasting
+
+def setup_quantile_loss(size, rng):
+    y_true, y_pred = _forecast_pair(rng, size)
+    return load_module("forecasting", "example").quantile_loss, [(y_true, y_pred + 5, 0.9)], size
+
+
+def setup_forecast_metrics(size, rng):
+    return load_module("forecasting", "example").forecast_metrics, [_forecast_pair(rng, size)], size
+
+
+def setup_forecast_evaluator(size, rng):
+    y_true, y_pred = _forecast_pair(rng, size)
+    offsets = np.r_[np.arange(0, size, 60), size]                 # 60-point series, the last one shorter
+    evaluate = load_module("forecasting", "batch_metrics").ForecastEvaluator(season=7).evaluate
+    return evaluate, [(y_true, y_pred, offsets)], size
+
+
+def setup_windowed_metrics(size, rng):
+    return load_module("forecasting", "backtest").windowed_metrics, [(*_forecast_pair(rng, size), 28)], size
+
+
+def setup_quantile_forecasts(size, rng):
+    quantiles = np.linspace(0.05, 0.95, 19)
+    n_series = max(1, size // (28 * len(quantiles)))              # 28-step horizon
+    y_true = rng.normal(100, 10, (n_series, 28))
+    q_pred = y_true[..., None] + rng.normal(0, 5, (n_series, 28, 1)) + 10 * np.sort(rng.normal(size=19))
+    score = load_module("forecasting", "probabilistic").score_quantile_forecasts
+    return score, [(y_true, q_pred, quantiles)], q_pred.size
+
+
+# regression and classification
+
+def _regression_summary(y_true, y_pred):
+    return load_module("regression", "streaming_metrics").RegressionAccumulator().update(y_true, y_pred).summary()
+
+
+def setup_regression(size, rng):
+    y_true = rng.standard_normal(size) * 10 + 50
+    return _regression_summary, [(y_true, y_true + rng.standard_normal(size) * 3)], size
+
+
+def _classification_summary(y_true, y_pred):
+    accumulator = load_module("classification", "streaming_metrics").ConfusionMatrixAccumulator()
+    return accumulator.update(y_true, y_pred).summary()
+
+
+def setup_classification(size, rng):
+    y_true, y_score = _labels_and_scores(rng, size)
+    return _classification_summary, [(y_true, (y_score > 0.5).astype(int))], size
+
+
+def setup_binary_curves(size, rng):
+    return load_module("classification", "curves").binary_curves, [_labels_and_scores(rng, size)], size
+
+
+# utils
+
+def setup_cross_validate(size, rng):
+    X = rng.standard_normal((size, 10))
+    y = (X[:, 0] + 0.5 * rng.standard_normal(size) > 0).astype(int)
+    cross_validate_mock = load_module("utils", "cross_validation").cross_validate_mock
+    return cross_validate_mock, [(X, y, 5, 0.1, 1, 1)], size     # n_workers=1: folds run in this process
+
+
+def setup_bootstrap(size, rng):
+    y_true, y_score = _labels_and_scores(rng, size)
+    bootstrap_ci = load_module("utils", "bootstrap").bootstrap_ci
+    return bootstrap_ci, [(y_true, (y_score > 0.5).astype(int), ("accuracy", "f1"), 200)], size
+
+
+def setup_sliced_metrics(size, rng):
+    y_true = rng.standard_normal(size)
+    groups = rng.integers(0, max(1, size // 100), size)          # ~100 rows per slice
+    sliced_metrics = load_module("utils", "sliced_metrics").sliced_metrics
+    return sliced_metrics, [(groups, y_true, y_true + rng.standard_normal(size))], size
+
+
+def setup_mcnemar(size, rng):
+    y_true = rng.integers(0, 2, max(1, size // 10))
+    predictions = np.where(rng.random((10, len(y_true))) < 0.85, y_true, 1 - y_true)    # 10 models
+    return load_module("utils", "model_comparison").mcnemar_tests, [(predictions, y_true)], predictions.size
+
+
+# deep learning
+
+def setup_training_history(size, rng):
+    n_steps = 1_000
+    train, val = load_module("deep_learning", "training_history").synthetic_histories(
+        max(1, size // n_steps), n_steps, seed=int(rng.integers(1 << 31)))
+    analyze = load_module("deep_learning", "training_history").analyze_histories
+    return analyze, [(val, train)], val.size
+
+
+LOOP_SIZES = (100, 1_000, 10_000)
+ARRAY_SIZES = (10_000, 1_000_000, 10_000_000)
+
+KERNELS = {
+    # computer_vision
+    "calculate_iou": (setup_iou, (1_000, 10_000, 100_000)),
+    "pairwise_iou": (setup_pairwise_iou, (10_000, 1_000_000, 16_000_000)),
+    "detection_map": (setup_detection, (100, 1_000, 10_000)),
+    "dice_coefficient": (setup_dice, ARRAY_SIZES),
+    "segmentation_confusion": (setup_confusion_matrix, ARRAY_SIZES),
+    "image_quality": (setup_image_quality, (10_000, 1_000_000, 4_000_000)),
+    # nlp
+    "bleu_score": (setup_bleu, LOOP_SIZES),
+    "rouge_n": (setup_rouge, LOOP_SIZES),
+    "corpus_scorer": (setup_corpus_scorer, (1_000, 10_000, 100_000)),
+    "perplexity": (setup_perplexity, ARRAY_SIZES),
+    "perplexity_accumulator": (setup_perplexity_accumulator, ARRAY_SIZES),
+    "embedding_search": (setup_embedding_search, (10_000, 100_000, 500_000)),
+    # forecasting
+    "quantile_loss": (setup_quantile_loss, ARRAY_SIZES),
+    "forecast_metrics": (setup_forecast_metrics, ARRAY_SIZES),
+    "forecast_evaluator": (setup_forecast_evaluator, (10_000, 1_000_000, 6_000_000)),
+    "windowed_metrics": (setup_windowed_metrics, (10_000, 1_000_000, 4_000_000)),
+    "quantile_forecasts": (setup_quantile_forecasts, (10_000, 1_000_000, 10_000_000)),
+    # regression, classification
+    "regression_summary": (setup_regression, ARRAY_SIZES),
+    "classification_summary": (setup_classification, ARRAY_SIZES),
+    "binary_curves": (setup_binary_curves, (10_000, 1_000_000, 4_000_000)),
+    # utils, deep_learning
+    "cross_validate_mock": (setup_cross_validate, (1_000, 10_000, 100_000)),
+    "bootstrap_ci": (setup_bootstrap, (1_000, 10_000, 100_000)),
+    "sliced_metrics": (setup_sliced_metrics, ARRAY_SIZES),
+    "mcnemar_tests": (setup_mcnemar, (10_000, 1_000_000, 10_000_000)),
+    "training_history": (setup_training_history, (10_000, 1_000_000, 10_000_000)),
+}
+
+
+def _runner(fn, calls):
+    def run():
+        for args in calls:
+            result = fn(*args)
+        return result
+    return run
+
+
+# --- Measurement ---------------------------------------------------------------------------------
+
+def time_call(run, min_time=0.2, min_repeats=3, max_repeats=100):
+    """Median and fastest wall time in ms over repeats of `run()` after one warm-up call"""
+    run()
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        deadline = time.perf_counter() + min_time
+        while len(times) < max_repeats and (len(times) < min_repeats or time.perf_counter() < deadline):
+            start = time.perf_counter_ns()
+            run()
+            times.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    times = np.array(times) / 1e6
+    return {"repeats": len(times), "median_ms": float(np.median(times)), "min_ms": float(times.min())}
+
+
+def memory_call(run):
+    """Peak and retained KiB, and retained blocks, of one traced call to `run()`
+
+    Only allocations made after tracing starts are tracked, so inputs
+    built before the call are not counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces(      # leave out the harness's own blocks
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+    finally:
+        tracemalloc.stop()
+    del result
+    retained = sum(trace.size for trace in snapshot.traces)
+    return {"peak_kib": peak / 1024, "retained_kib": retained / 1024, "blocks": len(snapshot.traces)}
+
+
+def run_suite(names=None, sizes=None, seed=0, min_time=0.2, memory=True, verbose=False):
+    """Time (and trace) each kernel at each size; returns a columnar table
+
+    `sizes` overrides every kernel's default sizes. Sizes count elements:
+    boxes, sentence pairs or images for the per-item kernels, values,
+    pixels or box pairs for the array kernels, rows for tabular ones. The
+    "items" column is the exact count a kernel ran on, and ns_per_item
+    divides by it.
+    """
+    names = list(names or KERNELS)
+    unknown = [name for name in names if name not in KERNELS]
+    if unknown:
+        raise ValueError(f"Unknown kernels {unknown}; choose from {list(KERNELS)}")
+    table = defaultdict(list)
+    for name in names:
+        setup, default_sizes = KERNELS[name]
+        for size in sizes or default_sizes:
+            fn, calls, items = setup(size, np.random.default_rng(seed))
+            run = _runner(fn, calls)
+            row = {"kernel": name, "size": size, "items": items, **time_call(run, min_time)}
+            row["ns_per_item"] = row["median_ms"] * 1e6 / max(1, items)
+            if memory:
+                row.update(memory_call(run))
+            for column, value in row.items():
+                table[column].append(value)
+            if verbose:
+                first = len(table["kernel"]) == 1
+                print(format_results({column: [value] for column, value in row.items()}, header=first))
+            del run, fn, calls
+    return dict(table)
+
+
+def environment():
+    """What a baseline was measured on; timings only compare on like hardware"""
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor(), "node": platform.node(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def save_baseline(results, path):
+    with open(path, "w") as f:
+        json.dump({"meta": environment(), "results": results}, f, indent=1)
+    return path
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS, min_delta_kib=MIN_DELTA_KIB):
+    """Ratios of current to baseline fastest time and peak memory per (kernel, size)
+
+    Fastest times are compared because noise only ever adds time. A row is
+    "slower" when its time ratio exceeds `threshold`, it is at least
+    `min_delta_ms` slower, and even its fastest call is slower than the
+    baseline's median; "more memory" when the peak ratio exceeds
+    `threshold` by at least `min_delta_kib`; "faster" below 1 / threshold;
+    and "new" when the baseline has no such row.
+    """
+    base = baseline.get("results", baseline)
+    previous = {(k, s): i for i, (k, s) in enumerate(zip(base["kernel"], base["size"]))}
+    table = defaultdict(list)
+    for i, key in enumerate(zip(results["kernel"], results["size"])):
+        j = previous.get(key)
+        ms, base_ms = results["min_ms"][i], base["min_ms"][j] if j is not None else float("nan")
+        time_ratio = ms / base_ms if j is not None else float("nan")
+        peak_ratio = peak_delta = float("nan")
+        if j is not None and "peak_kib" in results and "peak_kib" in base:
+            peak_delta = results["peak_kib"][i] - base["peak_kib"][j]
+            peak_ratio = results["peak_kib"][i] / base["peak_kib"][j] if base["peak_kib"][j] > 0 else float("nan")
+        if j is None:
+            status = "new"
+        elif time_ratio > threshold and ms - base_ms >= min_delta_ms and ms > base["median_ms"][j]:
+            status = "slower"
+        elif peak_ratio > threshold and peak_delta >= min_delta_kib:
+            status = "more memory"
+        elif time_ratio < 1 / threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        for column, value in zip(("kernel", "size", "baseline_ms", "min_ms", "time_ratio", "peak_ratio", "status"),
+                                 (*key, base_ms, ms, time_ratio, peak_ratio, status)):
+            table[column].append(value)
+    return dict(table)
+
+
+def regressions(comparison):
+    """(kernel, size) rows flagged slower or hungrier than the baseline"""
+    return [(k, s, status) for k, s, status in zip(comparison["kernel"], comparison["size"], comparison["status"])
+            if status in ("slower", "more memory")]
+
+
+def format_results(results, header=True):
+    """Plain-text table of run_suite results"""
+    memory = "peak_kib" in results
+    lines = []
+    if header:
+        lines.append(f"{'kernel':<24} {'size':>10} {'median ms':>10} {'min ms':>10} {'ns/item':>9}"
+                     + (f" {'peak KiB':>10} {'kept KiB':>9} {'blocks':>7}" if memory else ""))
+    for i in range(len(results["kernel"])):
+        line = (f"{results['kernel'][i]:<24} {results['size'][i]:>10,} {results['median_ms'][i]:>10.3f} "
+                f"{results['min_ms'][i]:>10.3f} {results['ns_per_item'][i]:>9.1f}")
+        if memory:
+            line += f" {results['peak_kib'][i]:>10.1f} {results['retained_kib'][i]:>9.1f} {results['blocks'][i]:>7}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_comparison(comparison):
+    """Plain-text table of compare() output"""
+    lines = [f"{'kernel':<24} {'size':>10} {'base ms':>10} {'now ms':>10} {'time x':>7} {'peak x':>7}  status"]
+    for i in range(len(comparison["kernel"])):
+        lines.append(f"{comparison['kernel'][i]:<24} {comparison['size'][i]:>10,} "
+                     f"{comparison['baseline_ms'][i]:>10.3f} {comparison['min_ms'][i]:>10.3f} "
+                     f"{comparison['time_ratio'][i]:>7.2f} {comparison['peak_ratio'][i]:>7.2f}  "
+                     f"{comparison['status'][i]}")
+    return "\n".join(lines)
+
+
+# --- Profiling hooks (opt-in) --------------------------------------------------------------------
+
+def profile_call(run, top=15, sort="cumulative"):
+    """cProfile one call to `run()`; returns the `top` functions by `sort` as text"""
+    profiler = cProfile.Profile()
+    profiler.runcall(run)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+def line_profile_call(run, top=15, root=ROOT):
+    """Time spent on each line of project code during one call to `run()`
+
+    A sys.settrace hook charges the time between consecutive trace events
+    to the project line that was running, so time inside numpy or the
+    standard library lands on the project line that called it, while
+    time in other project functions lands on their own lines. Only files
+    under `root` are traced, apart from this one. Tracing adds overhead
+    to every line, so compare lines with each other rather than with the
+    untraced timings.
+    """
+    this_file = os.path.abspath(__file__)
+    frame_lines = {}            # frame -> its line being executed
+    state = {"line": None, "since": time.perf_counter()}
+    seconds = defaultdict(float)
+    hits = defaultdict(int)
+
+    def trace_lines(frame, event, arg):
+        if state["line"] is not None:
+            seconds[state["line"]] += time.perf_counter() - state["since"]
+        if event == "line":
+            line = frame_lines[frame] = (frame.f_code.co_filename, frame.f_lineno)
+            hits[line] += 1
+            state["line"] = line
+        elif event == "return":
+            frame_lines.pop(frame, None)
+            state["line"] = frame_lines.get(frame.f_back)
+        state["since"] = time.perf_counter()
+        return trace_lines
+
+    def trace_calls(frame, event, arg):
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and filename != this_file:
+            return trace_lines
+        return None
+
+    sys.settrace(trace_calls)
+    try:
+        run()
+    finally:
+        sys.settrace(None)
+    total = sum(seconds.values()) or 1.0
+    lines = [f"{'ms':>9} {'%':>5} {'hits':>8}  line"]
+    for (filename, lineno), spent in sorted(seconds.items(), key=lambda item: -item[1])[:top]:
+        source = linecache.getline(filename, lineno).strip()
+        where = f"{os.path.relpath(filename, root)}:{lineno}"
+        lines.append(f"{spent * 1000:>9.2f} {100 * spent / total:>5.1f} {hits[(filename, lineno)]:>8}  "
+                     f"{where:<34} {source}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark metric kernels and compare against a baseline")
+    parser.add_argument("kernels", nargs="*", help=f"kernels to run (default: all of {', '.join(KERNELS)})")
+    parser.add_argument("--sizes", type=int, nargs="+", help="data sizes for every kernel (default: per kernel)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to keep repeating each timing")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a baseline; exit 1 on slowdowns")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown ratio to flag")
+    parser.add_argument("--profile", action="store_true", help="cProfile each kernel at its largest size")
+    parser.add_argument("--lines", action="store_true", help="per-line times of each kernel at its largest size")
+    parser.add_argument("--top", type=int, default=15, help="rows to show per profile")
+    args = parser.parse_args(argv)
+
+    names = args.kernels or list(KERNELS)
+    unknown = [name for name in names if name not in KERNELS]
+    if unknown:
+        parser.error(f"unknown kernels {', '.join(unknown)}; choose from {', '.join(KERNELS)}")
+
+    if args.profile or args.lines:
+        for name in names:
+            setup, default_sizes = KERNELS[name]
+            size = max(args.sizes or default_sizes)
+            fn, calls, _ = setup(size, np.random.default_rng(args.seed))
+            run = _runner(fn, calls)
+            run()                                               # imports and first-touch outside the profile
+            print(f"--- {name} (size {size:,}) ---")
+            if args.profile:
+                print(profile_call(run, args.top))
+            if args.lines:
+                print(line_profile_call(run, args.top))
+        return
+
+    results = run_suite(names, args.sizes, args.seed, args.min_time, memory=not args.no_memory, verbose=True)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"\nBaseline saved to {args.save}")
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        meta = baseline.get("meta", {})
+        if meta.get("machine") != platform.machine() or meta.get("node") != platform.node():
+            print(f"\nNote: baseline was measured on {meta.get('node')} ({meta.get('machine')}); "
+                  f"timings may not be comparable")
+        comparison = compare(results, baseline, args.threshold)
+        print()
+        print(format_comparison(comparison))
+        flagged = regressions(comparison)
+        if flagged:
+            print(f"\n{len(flagged)} regression(s) beyond {args.threshold:.2f}x: "
+                  + ", ".join(f"{k}@{s:,} ({status})" for k, s, status in flagged))
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import numpy as np
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
-    confusion_matrix, classification_report, roc_auc_score, roc_curve
+    confusion_matrix, classification_report
 )
 import matplotlib.pyplot as plt
 import seaborn as sns
+from curves import binary_curves
 
 # Mock binary classification data
 np.random.seed(42)
@@ -15,12 +16,15 @@ y_proba = np.random.rand(100)
 
 print("=== Binary Classification Metrics ===\n")
 
+# ROC-AUC and the ROC curve from a single sort of y_proba
+curves = binary_curves(y_true, y_proba)
+
 # Basic metrics
 print(f"Accuracy:  {accuracy_score(y_true, y_pred):.3f}")
 print(f"Precision: {precision_score(y_true, y_pred):.3f}")
 print(f"Recall:    {recall_score(y_true, y_pred):.3f}")
 print(f"F1-Score:  {f1_score(y_true, y_pred):.3f}")
-print(f"ROC-AUC:   {roc_auc_score(y_true, y_proba):.3f}\n")
+print(f"ROC-AUC:   {curves['roc_auc']:.3f}\n")
 
 # Confusion matrix
 cm = confusion_matrix(y_true, y_pred)
@@ -35,8 +39,7 @@ axes[0].set_title('Confusion Matrix')
 axes[0].set_ylabel('True Label')
 axes[0].set_xlabel('Predicted Label')
 
-fpr, tpr, _ = roc_curve(y_true, y_proba)
-axes[1].plot(fpr, tpr, label=f'ROC (AUC={roc_auc_score(y_true, y_proba):.2f})')
+axes[1].plot(curves['fpr'], curves['tpr'], label=f"ROC (AUC={curves['roc_auc']:.2f})")
 axes[1].plot([0, 1], [0, 1], 'k--', label='Random')
 axes[1].set_xlabel('False Positive Rate')
 axes[1].set_ylabel('True Positive Rate')
@@ -0,0 +1,206 @@
+import numpy as np
+
+
+def _safe_divide(num, den):
+    """num / den with 0 where den == 0 (sklearn's zero_division=0)"""
+    num = np.asarray(num, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=np.asarray(den) > 0)
+
+
+def _as_labels(labels):
+    """Integer view of a label array; floats pass only if every value is whole (1.0, not 0.7)"""
+    if labels.dtype.kind in "biu":
+        return labels
+    if labels.dtype.kind == "f" and np.all(np.mod(labels, 1) == 0):
+        return labels.astype(np.int64)
+    raise TypeError(f"Labels must be integer class ids, got {labels.dtype} values that are not whole numbers"
+                    if labels.dtype.kind == "f" else f"Labels must be integer class ids, got {labels.dtype}")
+
+
+class ConfusionMatrixAccumulator:
+    """Single-pass, mergeable confusion matrix for integer class labels 0..C-1
+
+    Each `update` adds one `np.bincount` of `y_true * C + y_pred`, so a live
+    prediction stream is scanned once and every metric below is derived
+    from the counts. The matrix grows if larger labels appear.
+    """
+
+    def __init__(self, n_classes=2):
+        self.counts = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+    @property
+    def n_classes(self):
+        return len(self.counts)
+
+    def _grow(self, n_classes):
+        grown = np.zeros((n_classes, n_classes), dtype=np.int64)
+        grown[:self.n_classes, :self.n_classes] = self.counts
+        self.counts = grown
+
+    def update(self, y_true, y_pred):
+        """Add a mini-batch of labels"""
+        y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"Shapes differ: {y_true.shape} vs {y_pred.shape}")
+        if y_true.size == 0:
+            return self
+        y_true, y_pred = _as_labels(y_true), _as_labels(y_pred)
+        low = min(y_true.min(), y_pred.min())
+        if low < 0:
+            raise ValueError("Labels must be non-negative integers")
+        high = int(max(y_true.max(), y_pred.max()))
+        if high >= self.n_classes:
+            self._grow(high + 1)
+
+        n = self.n_classes
+        index = y_true.astype(np.int64)
+        index *= n
+        index += y_pred
+        self.counts += np.bincount(index.ravel(), minlength=n * n).reshape(n, n)
+        return self
+
+    def merge(self, other):
+        """Add another accumulator's counts (e.g. from another worker)"""
+        if other.n_classes > self.n_classes:
+            self._grow(other.n_classes)
+        self.counts[:other.n_classes, :other.n_classes] += other.counts
+        return self
+
+    def confusion_matrix(self):
+        """Counts with rows = true label, columns = predicted label (like sklearn)"""
+        return self.counts.copy()
+
+    def per_class(self):
+        """Per-class precision, recall, f1 and support arrays"""
+        tp = np.diag(self.counts)
+        predicted = self.counts.sum(axis=0)
+        support = self.counts.sum(axis=1)
+        precision = _safe_divide(tp, predicted)
+        recall = _safe_divide(tp, support)
+        f1 = _safe_divide(2 * tp, predicted + support)
+        return precision, recall, f1, support
+
+    def accuracy(self):
+        total = self.counts.sum()
+        return np.trace(self.counts) / total if total else 0.0
+
+    def _average(self, index, average, pos_label):
+        values = self.per_class()
+        support = values[3]
+        if average == "binary":
+            return float(values[index][pos_label])
+        if average == "micro":
+            # Single-label micro precision, recall and F1 all equal accuracy
+            return float(self.accuracy())
+        if average == "macro":
+            return float(values[index].mean())
+        if average == "weighted":
+            return float(np.average(values[index], weights=support)) if support.sum() else 0.0
+        if average is None:
+            return values[index]
+        raise ValueError(f"Unknown average {average!r}")
+
+    def precision(self, average="binary", pos_label=1):
+        return self._average(0, average, pos_label)
+
+    def recall(self, average="binary", pos_label=1):
+        return self._average(1, average, pos_label)
+
+    def f1(self, average="binary", pos_label=1):
+        return self._average(2, average, pos_label)
+
+    def summary(self, average="binary", pos_label=1):
+        """Accuracy, precision, recall and F1 in one dict"""
+        return {
+            "accuracy": float(self.accuracy()),
+            "precision": self.precision(average, pos_label),
+            "recall": self.recall(average, pos_label),
+            "f1": self.f1(average, pos_label),
+        }
+
+    def classification_report(self, target_names=None, digits=2):
+        """Text report laid out like sklearn.metrics.classification_report"""
+        precision, recall, f1, support = self.per_class()
+        names = target_names or [str(i) for i in range(self.n_classes)]
+        total = int(support.sum())
+        rows = list(zip(names, precision, recall, f1, support))
+        averages = [
+            ("macro avg", precision.mean(), recall.mean(), f1.mean(), total),
+            ("weighted avg",
+             *(np.average(v, weights=support) if total else 0.0 for v in (precision, recall, f1)), total),
+        ]
+
+        width = max(max(len(n) for n in names), len("weighted avg"), digits)
+        headers = ["precision", "recall", "f1-score", "support"]
+        report = ("{:>{width}s} " + " {:>9}" * len(headers)).format("", *headers, width=width) + "\n\n"
+        row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+        for row in rows:
+            report += row_fmt.format(*row, width=width, digits=digits)
+        report += "\n"
+        accuracy_fmt = "{:>{width}s} " + " {:>9.{digits}}" * 2 + " {:>9.{digits}f}" + " {:>9}\n"
+        report += accuracy_fmt.format("accuracy", "", "", self.accuracy(), total, width=width, digits=digits)
+        for row in averages:
+            report += row_fmt.format(*row, width=width, digits=digits)
+        return report
+
+
+def benchmark(n_labels=100_000_000, chunk_size=10_000_000, n_classes=2):
+    """One streaming pass vs the separate sklearn calls made in example.py
+
+    The label arrays are generated as int8 so 100M labels fit in memory
+    for the sklearn side.
+    """
+    import time
+    from sklearn.metrics import (accuracy_score, confusion_matrix, f1_score,
+                                 precision_score, recall_score)
+
+    rng = np.random.default_rng(42)
+    y_true = rng.integers(0, n_classes, n_labels, dtype=np.int8)
+    y_pred = np.where(rng.random(n_labels, dtype=np.float32) < 0.8, y_true,
+                      rng.integers(0, n_classes, n_labels, dtype=np.int8))
+
+    start = time.perf_counter()
+    acc = ConfusionMatrixAccumulator(n_classes)
+    for i in range(0, n_labels, chunk_size):
+        acc.update(y_true[i:i + chunk_size], y_pred[i:i + chunk_size])
+    fast_result = acc.summary()
+    fast = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sk_result = {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred),
+        "recall": recall_score(y_true, y_pred),
+        "f1": f1_score(y_true, y_pred),
+    }
+    sk_cm = confusion_matrix(y_true, y_pred)
+    slow = time.perf_counter() - start
+
+    same = all(np.isclose(fast_result[k], sk_result[k]) for k in sk_result) and np.array_equal(acc.counts, sk_cm)
+    print(f"--- Benchmark ({n_labels:,} labels) ---")
+    print(f"sklearn (5 separate calls): {slow:.2f} s")
+    print(f"Streaming accumulator:      {fast:.2f} s ({slow / fast:.1f}x)")
+    print(f"Identical metrics: {same}")
+
+
+if __name__ == "__main__":
+    print("=== Streaming Confusion-Matrix Metrics ===\n")
+    rng = np.random.default_rng(42)
+
+    # Two workers each see part of a multi-class stream, then merge
+    workers = [ConfusionMatrixAccumulator(3), ConfusionMatrixAccumulator(3)]
+    for step in range(10):
+        y_true = rng.integers(0, 3, 1_000)
+        y_pred = np.where(rng.random(1_000) < 0.8, y_true, rng.integers(0, 3, 1_000))
+        workers[step % 2].update(y_true, y_pred)
+    total = workers[0].merge(workers[1])
+
+    print(f"Accuracy:        {total.accuracy():.3f}")
+    print(f"Macro F1:        {total.f1(average='macro'):.3f}")
+    print(f"Weighted recall: {total.recall(average='weighted'):.3f}")
+    print("Confusion Matrix:")
+    print(total.confusion_matrix())
+    print()
+    print(total.classification_report(target_names=["Class 0", "Class 1", "Class 2"]))
+
+    benchmark(n_labels=20_000_000)
@@ -1,5 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from boxes import pairwise_iou
+from image_quality import image_quality
+from segmentation import segmentation_metrics
 
 def calculate_iou(box1, box2):
     """Calculate IoU between two boxes [x1, y1, x2, y2]"""
@@ -24,63 +27,84 @@ def pixel_accuracy(pred, true):
     """Calculate pixel accuracy"""
     return np.sum(pred == true) / pred.size
 
-print("=== Computer Vision Metrics ===\n")
-
-# Object Detection - IoU
-print("--- Object Detection ---")
-gt_box = [50, 50, 150, 150]
-pred_box = [60, 60, 160, 140]
-iou = calculate_iou(gt_box, pred_box)
-print(f"IoU: {iou:.3f}")
-print(f"Detection: {'✓ Correct' if iou > 0.5 else '✗ Incorrect'} (threshold=0.5)\n")
-
-# Segmentation
-print("--- Segmentation ---")
-np.random.seed(42)
-true_mask = np.random.randint(0, 2, (100, 100))
-pred_mask = true_mask.copy()
-pred_mask[np.random.choice(10000, 1000, replace=False)] = 1 - pred_mask.flat[np.random.choice(10000, 1000, replace=False)]
-
-dice = dice_coefficient(pred_mask, true_mask)
-pix_acc = pixel_accuracy(pred_mask, true_mask)
-
-print(f"Dice Coefficient: {dice:.3f}")
-print(f"Pixel Accuracy:   {pix_acc:.3f}\n")
-
-# Image Quality
-print("--- Image Quality ---")
-original = np.random.rand(100, 100)
-reconstructed = original + np.random.randn(100, 100) * 0.1
-
-mse = np.mean((original - reconstructed) ** 2)
-psnr = 10 * np.log10(1.0 / mse)
-print(f"PSNR: {psnr:.2f} dB")
-
-# Visualization
-fig, axes = plt.subplots(1, 3, figsize=(15, 4))
-
-# IoU visualization
-axes[0].add_patch(plt.Rectangle((gt_box[0], gt_box[1]), gt_box[2]-gt_box[0], 
-                                 gt_box[3]-gt_box[1], fill=False, edgecolor='green', linewidth=2, label='Ground Truth'))
-axes[0].add_patch(plt.Rectangle((pred_box[0], pred_box[1]), pred_box[2]-pred_box[0], 
-                                 pred_box[3]-pred_box[1], fill=False, edgecolor='red', linewidth=2, label='Prediction'))
-axes[0].set_xlim(0, 200)
-axes[0].set_ylim(0, 200)
-axes[0].set_aspect('equal')
-axes[0].invert_yaxis()
-axes[0].set_title(f'Object Detection (IoU={iou:.3f})')
-axes[0].legend()
-axes[0].grid(True)
-
-# Segmentation
-axes[1].imshow(true_mask, cmap='gray')
-axes[1].set_title(f'True Mask (Dice={dice:.3f})')
-axes[1].axis('off')
-
-axes[2].imshow(pred_mask, cmap='gray')
-axes[2].set_title('Predicted Mask')
-axes[2].axis('off')
-
-plt.tight_layout()
-plt.savefig('computer_vision/cv_metrics.png')
-print("\n✓ Saved visualization to 'computer_vision/cv_metrics.png'")
+def main():
+    print("=== Computer Vision Metrics ===\n")
+
+    # Object Detection - IoU
+    print("--- Object Detection ---")
+    gt_box = [50, 50, 150, 150]
+    pred_box = [60, 60, 160, 140]
+    iou = calculate_iou(gt_box, pred_box)
+    print(f"IoU: {iou:.3f}")
+    print(f"Detection: {'✓ Correct' if iou > 0.5 else '✗ Incorrect'} (threshold=0.5)")
+
+    # Many boxes at once: one broadcasted N×M matrix instead of N×M calculate_iou calls
+    pred_boxes = np.array([pred_box, [55, 45, 145, 155], [300, 300, 350, 350]])
+    gt_boxes = np.array([gt_box, [290, 310, 360, 340]])
+    iou_matrix = pairwise_iou(pred_boxes, gt_boxes)
+    print("IoU matrix (predictions × ground truth):")
+    print(np.round(iou_matrix, 3))
+    same = all(np.isclose(iou_matrix[i, j], calculate_iou(p, g))
+               for i, p in enumerate(pred_boxes) for j, g in enumerate(gt_boxes))
+    print(f"Matches calculate_iou: {same}\n")
+
+    # Segmentation
+    print("--- Segmentation ---")
+    np.random.seed(42)
+    true_mask = np.random.randint(0, 2, (100, 100))
+    pred_mask = true_mask.copy()
+    flip_idx = np.random.choice(10000, 1000, replace=False)
+    pred_mask.flat[flip_idx] = 1 - pred_mask.flat[flip_idx]
+
+    dice = dice_coefficient(pred_mask, true_mask)
+    pix_acc = pixel_accuracy(pred_mask, true_mask)
+
+    print(f"Dice Coefficient: {dice:.3f}")
+    print(f"Pixel Accuracy:   {pix_acc:.3f}")
+
+    # Same numbers from integer counts accumulated tile by tile (works on memmaps / .npy files)
+    seg = segmentation_metrics(pred_mask, true_mask, num_classes=2, tile_pixels=1000)
+    print(f"Tiled: Dice={seg['dice']:.3f}, Pixel Accuracy={seg['pixel_accuracy']:.3f}, mIoU={seg['mean_iou']:.3f}\n")
+
+    # Image Quality
+    print("--- Image Quality ---")
+    original = np.random.rand(100, 100)
+    reconstructed = original + np.random.randn(100, 100) * 0.1
+
+    mse = np.mean((original - reconstructed) ** 2)
+    psnr = 10 * np.log10(1.0 / mse)
+    print(f"PSNR: {psnr:.2f} dB")
+    print(f"SSIM: {image_quality(reconstructed, original)['ssim'][0]:.3f}")
+
+    # Visualization
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+
+    # IoU visualization
+    axes[0].add_patch(plt.Rectangle((gt_box[0], gt_box[1]), gt_box[2]-gt_box[0], 
+                                     gt_box[3]-gt_box[1], fill=False, edgecolor='green', linewidth=2, label='Ground Truth'))
+    axes[0].add_patch(plt.Rectangle((pred_box[0], pred_box[1]), pred_box[2]-pred_box[0], 
+                                     pred_box[3]-pred_box[1], fill=False, edgecolor='red', linewidth=2, label='Prediction'))
+    axes[0].set_xlim(0, 200)
+    axes[0].set_ylim(0, 200)
+    axes[0].set_aspect('equal')
+    axes[0].invert_yaxis()
+    axes[0].set_title(f'Object Detection (IoU={iou:.3f})')
+    axes[0].legend()
+    axes[0].grid(True)
+
+    # Segmentation
+    axes[1].imshow(true_mask, cmap='gray')
+    axes[1].set_title(f'True Mask (Dice={dice:.3f})')
+    axes[1].axis('off')
+
+    axes[2].imshow(pred_mask, cmap='gray')
+    axes[2].set_title('Predicted Mask')
+    axes[2].axis('off')
+
+    plt.tight_layout()
+    plt.savefig('computer_vision/cv_metrics.png')
+    print("\n✓ Saved visualization to 'computer_vision/cv_metrics.png'")
+
+
+if __name__ == "__main__":
+    main()
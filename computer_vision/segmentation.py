@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+
+
+def open_mask(mask):
+    """Return a mask array; `.npy` paths are opened memory-mapped instead of loaded"""
+    if isinstance(mask, (str, os.PathLike)):
+        return np.load(mask, mmap_mode="r")
+    return mask if isinstance(mask, np.ndarray) else np.asarray(mask)
+
+
+def iter_tiles(pred, true, tile_pixels=1 << 22):
+    """Yield matching flat tiles of two masks, about `tile_pixels` pixels each
+
+    Tiles are runs of whole rows (leading axis), so with C-ordered
+    memmaps each tile is a contiguous read from disk.
+    """
+    pred, true = open_mask(pred), open_mask(true)
+    if pred.shape != true.shape:
+        raise ValueError(f"Mask shapes differ: {pred.shape} vs {true.shape}")
+    if pred.ndim == 0 or pred.size == 0:
+        return
+    row_pixels = max(1, pred.size // pred.shape[0])
+    rows = max(1, tile_pixels // row_pixels)
+    for start in range(0, pred.shape[0], rows):
+        yield (np.asarray(pred[start:start + rows]).ravel(),
+               np.asarray(true[start:start + rows]).ravel())
+
+
+def confusion_matrix(pred, true, num_classes=2, tile_pixels=1 << 22):
+    """Integer (num_classes × num_classes) confusion matrix, rows = true, cols = pred
+
+    Built tile by tile with a single bincount per tile, so peak memory is
+    a few tile-sized integer buffers regardless of the mask size.
+    """
+    n_bins = num_classes * num_classes
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for pred_tile, true_tile in iter_tiles(pred, true, tile_pixels):
+        for tile in (pred_tile, true_tile):             # checked apart, or (true 0, pred 2) lands in (1, 0)
+            if tile.dtype.kind not in "biu":
+                raise TypeError(f"Masks must hold integer or boolean labels, got {tile.dtype}")
+            if tile.min() < 0 or tile.max() >= num_classes:
+                raise ValueError(f"Mask values must be integer labels in [0, {num_classes})")
+        index = true_tile.astype(np.intp)
+        index *= num_classes
+        index += pred_tile
+        counts += np.bincount(index, minlength=n_bins)
+    return counts.reshape(num_classes, num_classes)
+
+
+def metrics_from_confusion(cm):
+    """Dice, IoU per class, mIoU and pixel accuracy from a confusion matrix"""
+    cm = np.asarray(cm, dtype=np.int64)
+    tp = np.diag(cm)
+    true_sum = cm.sum(axis=1)
+    pred_sum = cm.sum(axis=0)
+    union = true_sum + pred_sum - tp
+    present = union > 0
+
+    iou = np.full(len(cm), np.nan)
+    iou[present] = tp[present] / union[present]
+    dice = np.full(len(cm), np.nan)
+    denom = true_sum + pred_sum
+    dice[denom > 0] = 2 * tp[denom > 0] / denom[denom > 0]
+
+    total = cm.sum()
+    return {
+        "pixel_accuracy": tp.sum() / total if total else float("nan"),
+        "iou_per_class": iou,
+        "dice_per_class": dice,
+        "mean_iou": float(np.nanmean(iou)) if present.any() else float("nan"),
+        # Binary masks: foreground class 1, same as dice_coefficient
+        "dice": float(dice[1]) if len(cm) == 2 else float(np.nanmean(dice)),
+    }
+
+
+def segmentation_metrics(pred, true, num_classes=2, tile_pixels=1 << 22):
+    """Dice, pixel accuracy and mIoU for arrays, memmaps or `.npy` paths in one tiled pass"""
+    cm = confusion_matrix(pred, true, num_classes, tile_pixels)
+    return {"confusion_matrix": cm, **metrics_from_confusion(cm)}
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    import tracemalloc
+
+    print("=== Tiled Segmentation Metrics ===\n")
+    rng = np.random.default_rng(42)
+    shape, num_classes = (8_000, 8_000), 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Write two 64-megapixel label masks to disk without holding them in RAM
+        true_path, pred_path = os.path.join(tmp, "true.npy"), os.path.join(tmp, "pred.npy")
+        true_mm = np.lib.format.open_memmap(true_path, mode="w+", dtype=np.uint8, shape=shape)
+        pred_mm = np.lib.format.open_memmap(pred_path, mode="w+", dtype=np.uint8, shape=shape)
+        for start in range(0, shape[0], 1_000):
+            block = rng.integers(0, num_classes, (1_000, shape[1]), dtype=np.uint8)
+            true_mm[start:start + 1_000] = block
+            noise = rng.random(block.shape) < 0.1
+            block[noise] = rng.integers(0, num_classes, noise.sum(), dtype=np.uint8)
+            pred_mm[start:start + 1_000] = block
+        true_mm.flush()
+        pred_mm.flush()
+        del true_mm, pred_mm
+
+        print(f"Mask: {shape[0]:,} × {shape[1]:,} ({shape[0] * shape[1] / 1e6:.0f} MP), {num_classes} classes")
+        for tile_pixels in (1 << 18, 1 << 20, 1 << 22):
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = segmentation_metrics(pred_path, true_path, num_classes, tile_pixels)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Tile {tile_pixels:>9,} px: {elapsed:.2f} s, peak {peak / 1024 ** 2:6.1f} MB, "
+                  f"mIoU={result['mean_iou']:.4f}, pixel acc={result['pixel_accuracy']:.4f}")
+
+    print(f"\nIoU per class: {np.round(result['iou_per_class'], 4)}")
+    print(f"Dice per class: {np.round(result['dice_per_class'], 4)}")
@@ -0,0 +1,444 @@
+import io
+import os
+
+import numpy as np
+
+# example.py: final val loss more than 10% above the best means overfitting
+OVERFIT_RATIO = 1.1
+
+
+def pad_runs(histories, fill=np.nan):
+    """Stack per-run 1D curves of different lengths into a padded (runs, steps) array plus lengths"""
+    lengths = np.array([len(h) for h in histories], dtype=np.int64)
+    padded = np.full((len(histories), lengths.max(initial=0)), fill, dtype=np.float64)
+    for i, history in enumerate(histories):
+        padded[i, :lengths[i]] = history
+    return padded, lengths
+
+
+def _lengths(values, lengths=None, mask=None):
+    if lengths is not None:
+        return np.asarray(lengths, dtype=np.int64)
+    if mask is not None:
+        return np.asarray(mask, dtype=bool).sum(axis=1)
+    return np.full(len(values), values.shape[1], dtype=np.int64)
+
+
+def ema(values, alpha=0.9, block=256):
+    """Bias-corrected exponential moving average along the last axis (TensorBoard-style smoothing)
+
+    s_t = alpha·s_{t-1} + (1 - alpha)·x_t, divided by 1 - alpha^(t+1).
+    The recursion is evaluated `block` steps at a time as one matrix
+    product with a lower-triangular decay matrix plus the carried-in
+    state, so thousands of runs are smoothed without a Python loop per
+    step. Non-finite values (padding) must be filled before calling.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_steps = values.shape[-1]
+    k = np.arange(min(block, n_steps))
+    exponent = k[:, None] - k[None, :]
+    decay = np.where(exponent >= 0, (1 - alpha) * alpha ** np.maximum(exponent, 0), 0.0)
+    carry_decay = alpha ** (k + 1)
+
+    out = np.empty_like(values)
+    carry = np.zeros(values.shape[:-1])
+    for start in range(0, n_steps, block):
+        size = min(block, n_steps - start)
+        out[..., start:start + size] = (values[..., start:start + size] @ decay[:size, :size].T
+                                        + carry[..., None] * carry_decay[:size])
+        carry = out[..., start + size - 1]
+    return out / (1 - alpha ** (np.arange(n_steps) + 1))
+
+
+def _first(condition, valid):
+    """Index of the first True in each row where also valid, else -1"""
+    hit = condition & valid
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), -1)
+
+
+def _patience_stops(val, valid, patience, min_delta):
+    """Early-stop step and the best step it would restore, per run (-1 if it never stops)
+
+    Keras semantics: an improvement is a value below the best so far by
+    more than `min_delta`; training stops once `patience` evaluations in
+    a row have not improved. With min_delta = 0 the best-so-far is a
+    running minimum, done with accumulate; otherwise the best depends on
+    which steps counted as improvements, so steps are walked in order
+    (vectorized across runs).
+    """
+    n_runs, n_steps = val.shape
+    steps = np.arange(n_steps)
+    if min_delta == 0:
+        previous_min = np.empty_like(val)
+        previous_min[:, 0] = np.inf
+        np.minimum.accumulate(val[:, :-1], axis=1, out=previous_min[:, 1:])
+        improved = val < previous_min
+        last_improvement = np.maximum.accumulate(np.where(improved, steps, 0), axis=1)
+    else:
+        last_improvement = np.empty((n_runs, n_steps), dtype=np.int64)
+        best = np.full(n_runs, np.inf)
+        last = np.zeros(n_runs, dtype=np.int64)
+        for t in range(n_steps):
+            improved = val[:, t] < best - min_delta
+            best = np.where(improved, val[:, t], best)
+            last = np.where(improved, t, last)
+            last_improvement[:, t] = last
+    stop = _first(steps - last_improvement >= patience, valid)
+    restore = np.where(stop >= 0, last_improvement[np.arange(n_runs), np.maximum(stop, 0)], -1)
+    return stop, restore
+
+
+def _analyze_chunk(val, train, lengths, alpha, patience, min_delta, plateau_window, plateau_tol, overfit_ratio):
+    n_runs, n_steps = val.shape
+    rows = np.arange(n_runs)
+    last = lengths - 1
+    valid = np.arange(n_steps) < lengths[:, None]
+    val_inf = np.where(valid, val, np.inf)           # padding never wins a minimum
+
+    best_step = val_inf.argmin(axis=1)
+    best_val = val[rows, best_step]
+    final_val = val[rows, last]
+    smooth = ema(np.where(valid, val, 0.0), alpha)
+    smooth_inf = np.where(valid, smooth, np.inf)
+
+    # Overfitting onset: smoothed val loss first exceeds overfit_ratio × its best so far
+    running_min = np.minimum.accumulate(smooth_inf, axis=1)
+    overfit_step = _first(smooth > overfit_ratio * running_min, valid)
+
+    # Plateau onset: smoothed val loss improved by less than plateau_tol (relative) over the window
+    w = plateau_window
+    plateau_step = np.full(n_runs, -1)
+    if n_steps > w:
+        earlier = smooth[:, :-w]
+        gain = (earlier - smooth[:, w:]) / np.abs(earlier)
+        found = _first(gain < plateau_tol, valid[:, w:])
+        plateau_step = np.where(found >= 0, found + w, -1)
+
+    stop_step, restore_step = _patience_stops(val_inf, valid, patience, min_delta)
+    result = {
+        "length": lengths,
+        "best_step": best_step,
+        "best_val": best_val,
+        "final_val": final_val,
+        "smoothed_final_val": smooth[rows, last],
+        "overfit": final_val > overfit_ratio * best_val,
+        "overfit_step": overfit_step,
+        "plateau_step": plateau_step,
+        "stop_step": stop_step,
+        "restore_step": restore_step,
+        "steps_saved": np.where(stop_step >= 0, last - stop_step, 0),
+    }
+    if train is not None:
+        result["final_gap"] = final_val - train[rows, last]
+        result["gap_at_best"] = best_val - train[rows, best_step]
+    return result
+
+
+def analyze_histories(val_loss, train_loss=None, lengths=None, mask=None, alpha=0.9, patience=10, min_delta=0.0,
+                      plateau_window=20, plateau_tol=0.01, overfit_ratio=OVERFIT_RATIO, chunk_size=512):
+    """Per-run training diagnostics for a padded (runs, steps) array of validation (and train) losses
+
+    Runs end at `lengths` (or the True prefix of `mask`); without either,
+    every run uses all steps. Runs are processed `chunk_size` at a time,
+    all steps at once. Steps are 0-based, and -1 means "never". Returns a
+    columnar dict with one entry per run:
+
+    - best_step / best_val: np.argmin of the validation loss, as in example.py
+    - overfit: example.py's rule, final val loss > overfit_ratio × best
+    - overfit_step: first step where the EMA-smoothed val loss exceeds
+      overfit_ratio × its own best so far
+    - plateau_step: first step where the smoothed val loss improved by
+      less than plateau_tol (relative) over the last plateau_window steps
+    - stop_step / restore_step: where patience-based early stopping halts,
+      and the checkpoint it restores
+    - final_gap / gap_at_best: val minus train loss (with train_loss)
+    """
+    val_loss = np.asarray(val_loss)
+    lengths = _lengths(val_loss, lengths, mask)
+    if lengths.min(initial=1) < 1:
+        raise ValueError("Every run needs at least one step")
+    parts = []
+    for start in range(0, len(val_loss), chunk_size):
+        stop = start + chunk_size
+        n_steps = lengths[start:stop].max()
+        val = np.asarray(val_loss[start:stop, :n_steps], dtype=np.float64)
+        train = None if train_loss is None else np.asarray(train_loss[start:stop, :n_steps], dtype=np.float64)
+        parts.append(_analyze_chunk(val, train, lengths[start:stop], alpha, patience, min_delta,
+                                    plateau_window, plateau_tol, overfit_ratio))
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+class HistoryTracker:
+    """Live version of analyze_histories: O(runs updated) work per new step, no rescans
+
+    Each run keeps its EMA state, best value and step, patience counter,
+    the smoothed values of the last `plateau_window` steps (a ring
+    buffer) and the onset steps found so far. `summary()` returns the
+    same columns as analyze_histories over everything seen so far.
+    """
+
+    def __init__(self, n_runs, alpha=0.9, patience=10, min_delta=0.0, plateau_window=20, plateau_tol=0.01,
+                 overfit_ratio=OVERFIT_RATIO):
+        self.alpha = alpha
+        self.patience = patience
+        self.min_delta = min_delta
+        self.plateau_window = plateau_window
+        self.plateau_tol = plateau_tol
+        self.overfit_ratio = overfit_ratio
+        never = lambda: np.full(n_runs, -1, dtype=np.int64)
+
+        self.n = np.zeros(n_runs, dtype=np.int64)
+        self._ema = np.zeros(n_runs)
+        self._smooth_min = np.full(n_runs, np.inf)
+        self._recent = np.zeros((n_runs, plateau_window + 1))    # ring buffer of smoothed values
+        self.best_val, self.best_step = np.full(n_runs, np.inf), never()
+        self._patience_best = np.full(n_runs, np.inf)
+        self._last_improvement = np.zeros(n_runs, dtype=np.int64)
+        self.final_val, self.final_train = np.full(n_runs, np.nan), np.full(n_runs, np.nan)
+        self._train_at_best = np.full(n_runs, np.nan)
+        self.overfit_step, self.plateau_step = never(), never()
+        self.stop_step, self.restore_step = never(), never()
+
+    def update(self, run_ids, val_loss, train_loss=None):
+        """Append one step to each of `run_ids` (unique within a call)"""
+        runs = np.asarray(run_ids, dtype=np.int64)
+        val = np.asarray(val_loss, dtype=np.float64)
+        step = self.n[runs]
+
+        self._ema[runs] = self.alpha * self._ema[runs] + (1 - self.alpha) * val
+        smooth = self._ema[runs] / (1 - self.alpha ** (step + 1))
+        self._smooth_min[runs] = np.minimum(self._smooth_min[runs], smooth)
+        width = self.plateau_window + 1
+        self._recent[runs, step % width] = smooth
+
+        better = val < self.best_val[runs]
+        self.best_val[runs] = np.where(better, val, self.best_val[runs])
+        self.best_step[runs] = np.where(better, step, self.best_step[runs])
+        self.final_val[runs] = val
+        if train_loss is not None:
+            train = np.asarray(train_loss, dtype=np.float64)
+            self.final_train[runs] = train
+            self._train_at_best[runs] = np.where(better, train, self._train_at_best[runs])
+
+        improved = val < self._patience_best[runs] - self.min_delta
+        self._patience_best[runs] = np.where(improved, val, self._patience_best[runs])
+        self._last_improvement[runs] = np.where(improved, step, self._last_improvement[runs])
+
+        def first(onset, condition):
+            new = (onset[runs] < 0) & condition
+            onset[runs[new]] = step[new]
+
+        first(self.overfit_step, smooth > self.overfit_ratio * self._smooth_min[runs])
+        earlier = self._recent[runs, (step + 1) % width]           # smoothed value plateau_window steps ago
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gain = (earlier - smooth) / np.abs(earlier)
+        full = step >= self.plateau_window                          # ring buffer full; earlier slots are 0 until then
+        first(self.plateau_step, full & (gain < self.plateau_tol))
+        stopping = (self.stop_step[runs] < 0) & (step - self._last_improvement[runs] >= self.patience)
+        self.restore_step[runs[stopping]] = self._last_improvement[runs[stopping]]
+        first(self.stop_step, stopping)
+        self.n[runs] += 1
+        return self
+
+    def extend(self, new_rows, val_column=-1, train_column=None):
+        """Feed several steps per run, e.g. from LogTailer.poll(): {run: (k, n_columns) array}
+
+        Step i of every run that has one is applied in the same
+        vectorized update.
+        """
+        new_rows = {run: rows for run, rows in new_rows.items() if len(rows)}
+        for i in range(max((len(rows) for rows in new_rows.values()), default=0)):
+            runs = [run for run, rows in new_rows.items() if len(rows) > i]
+            val = [new_rows[run][i, val_column] for run in runs]
+            train = None if train_column is None else [new_rows[run][i, train_column] for run in runs]
+            self.update(runs, val, train)
+        return self
+
+    def should_stop(self):
+        """Runs the patience rule says to stop now (for killing runs in a live sweep)"""
+        return np.flatnonzero(self.stop_step >= 0)
+
+    def summary(self):
+        last = self.n - 1
+        smoothed_final = self._ema / (1 - self.alpha ** np.maximum(self.n, 1))
+        result = {
+            "length": self.n.copy(),
+            "best_step": self.best_step.copy(),
+            "best_val": self.best_val.copy(),
+            "final_val": self.final_val.copy(),
+            "smoothed_final_val": smoothed_final,
+            "overfit": self.final_val > self.overfit_ratio * self.best_val,
+            "overfit_step": self.overfit_step.copy(),
+            "plateau_step": self.plateau_step.copy(),
+            "stop_step": self.stop_step.copy(),
+            "restore_step": self.restore_step.copy(),
+            "steps_saved": np.where(self.stop_step >= 0, last - self.stop_step, 0),
+        }
+        if not np.isnan(self.final_train).all():
+            result["final_gap"] = self.final_val - self.final_train
+            result["gap_at_best"] = self.best_val - self._train_at_best
+        return result
+
+
+def _is_header(line, n_fields=None, delimiter=","):
+    """True unless the first `n_fields` fields of a CSV line all parse as floats (1e-3, nan and inf do)"""
+    try:
+        [float(field) for field in line.split(delimiter)[:n_fields]]
+    except ValueError:
+        return True
+    return False
+
+
+class LogTailer:
+    """Incremental reader for append-only per-run CSV logs (e.g. step,train_loss,val_loss)
+
+    Remembers a byte offset per file and only parses complete lines
+    added since the last poll; a partly written last line is left for the
+    next poll. A file's first line is skipped when `header` is True; by
+    default it is skipped only if some field is not a number.
+    """
+
+    def __init__(self, paths, header=None):
+        self.paths = list(paths)
+        self.header = header
+        self.offsets = [0] * len(self.paths)
+
+    def poll(self):
+        """{run index: (k, n_columns) array of new rows} for runs with new complete lines"""
+        new_rows = {}
+        for run, path in enumerate(self.paths):
+            if not os.path.exists(path) or os.path.getsize(path) <= self.offsets[run]:
+                continue
+            with open(path, "rb") as f:
+                f.seek(self.offsets[run])
+                chunk = f.read()
+            end = chunk.rfind(b"\n") + 1
+            if end == 0:
+                continue
+            text = chunk[:end].decode()
+            if self.offsets[run] == 0:
+                first, text = text.split("\n", 1)
+                if not (_is_header(first) if self.header is None else self.header):
+                    text = first + "\n" + text
+            self.offsets[run] += end
+            if text.strip():
+                new_rows[run] = np.loadtxt(io.StringIO(text), delimiter=",", ndmin=2)
+        return new_rows
+
+
+def _loop_analyze(val, train, alpha, patience, plateau_window, plateau_tol, overfit_ratio):
+    """One run analysed step by step in Python, for the benchmark"""
+    best_step = int(np.argmin(val))
+    s, smooth = 0.0, []
+    for t, x in enumerate(val):
+        s = alpha * s + (1 - alpha) * x
+        smooth.append(s / (1 - alpha ** (t + 1)))
+    best, last_improvement, stop = np.inf, 0, -1
+    for t, x in enumerate(val):
+        if x < best:
+            best, last_improvement = x, t
+        elif t - last_improvement >= patience:
+            stop = t
+            break
+    running_min, overfit_step = np.inf, -1
+    for t, x in enumerate(smooth):
+        running_min = min(running_min, x)
+        if x > overfit_ratio * running_min:
+            overfit_step = t
+            break
+    plateau_step = next((t for t in range(plateau_window, len(smooth))
+                         if (smooth[t - plateau_window] - smooth[t]) / abs(smooth[t - plateau_window]) < plateau_tol),
+                        -1)
+    return best_step, stop, overfit_step, plateau_step, val[-1] - train[-1]
+
+
+def synthetic_histories(n_runs, n_steps, seed=42):
+    """Loss curves with per-run learning speed, noise and (for some runs) overfitting after a minimum"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_steps)
+    speed = rng.uniform(0.2, 2.0, (n_runs, 1)) * 10 / n_steps
+    floor = rng.uniform(0.05, 0.3, (n_runs, 1))
+    train = floor + 2.0 * np.exp(-speed * t) + rng.normal(0, 0.01, (n_runs, n_steps))
+    drift = np.where(rng.random((n_runs, 1)) < 0.3, rng.uniform(0.5, 3.0, (n_runs, 1)) / n_steps, 0.0)
+    onset = rng.integers(n_steps // 4, n_steps, (n_runs, 1))
+    val = train + 0.1 + drift * np.maximum(t - onset, 0) + rng.normal(0, 0.03, (n_runs, n_steps))
+    return train, val
+
+
+def benchmark(n_runs=2_000, n_steps=10_000):
+    """Vectorized analysis vs a per-run Python loop"""
+    import time
+
+    train, val = synthetic_histories(n_runs, n_steps)
+    lengths = np.random.default_rng(0).integers(n_steps // 2, n_steps + 1, n_runs)
+    valid = np.arange(n_steps) < lengths[:, None]
+    val, train = np.where(valid, val, np.nan), np.where(valid, train, np.nan)
+
+    n_loop = 20
+    start = time.perf_counter()
+    loop = [_loop_analyze(val[r, :lengths[r]], train[r, :lengths[r]], 0.9, 10, 20, 0.01, OVERFIT_RATIO)
+            for r in range(n_loop)]
+    slow = (time.perf_counter() - start) * n_runs / n_loop
+
+    start = time.perf_counter()
+    result = analyze_histories(val, train, lengths)
+    fast = time.perf_counter() - start
+
+    loop = np.array(loop)
+    same = all(np.array_equal(loop[:, i], result[name][:n_loop])
+               for i, name in enumerate(("best_step", "stop_step", "overfit_step", "plateau_step"))) and \
+        np.allclose(loop[:, 4], result["final_gap"][:n_loop])
+    print(f"--- Benchmark ({n_runs:,} runs × up to {n_steps:,} steps) ---")
+    print(f"Per-run Python loops: ~{slow:.0f} s (extrapolated from {n_loop} runs)")
+    print(f"Vectorized analysis:  {fast:.2f} s (~{slow / fast:.0f}x)")
+    print(f"Same results on the checked runs: {same}")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== Training History Analysis ===\n")
+    n_runs, n_steps = 1_000, 300
+    train, val = synthetic_histories(n_runs, n_steps)
+    lengths = np.random.default_rng(1).integers(100, n_steps + 1, n_runs)    # some runs were cut short
+
+    result = analyze_histories(val, train, lengths, patience=15)
+    print(f"--- Sweep of {n_runs:,} runs ---")
+    print(f"Flagged by the raw {OVERFIT_RATIO}x rule:   {result['overfit'].mean():.0%} (noisy final values trip it)")
+    print(f"Smoothed overfitting onset found: {(result['overfit_step'] >= 0).mean():.0%} (30% of runs really drift up)")
+    print(f"Reached a plateau:                {(result['plateau_step'] >= 0).mean():.0%}")
+    stopped = result["stop_step"] >= 0
+    print(f"Early stopping (patience 15) would stop {stopped.mean():.0%} of runs and save "
+          f"{result['steps_saved'].sum() / lengths.sum():.0%} of all steps")
+    order = np.argsort(result["smoothed_final_val"])[:3]
+    print("Top runs by smoothed final val loss:")
+    print(f"{'run':>5} {'smoothed':>9} {'best step':>9} {'best val':>9} {'gap@best':>9} {'stop':>5} {'restore':>7}")
+    for run in order:
+        print(f"{run:>5} {result['smoothed_final_val'][run]:>9.4f} {result['best_step'][run]:>9} "
+              f"{result['best_val'][run]:>9.4f} "
+              f"{result['gap_at_best'][run]:>9.4f} {result['stop_step'][run]:>5} {result['restore_step'][run]:>7}")
+
+    # Live: 50 runs append to CSV logs while a tracker follows them
+    print("\n--- Live tracking from append-only logs ---")
+    n_live = 50
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"run_{i}.csv") for i in range(n_live)]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write("step,train_loss,val_loss\n")
+        tailer, tracker = LogTailer(paths), HistoryTracker(n_live, patience=15)
+        written = np.zeros(n_live, dtype=np.int64)
+        rng = np.random.default_rng(7)
+        while (written < lengths[:n_live]).any():
+            for run in range(n_live):                  # each run logs a few steps at its own pace
+                upto = min(written[run] + rng.integers(0, 8), lengths[run])
+                with open(paths[run], "a") as f:
+                    f.writelines(f"{s},{train[run, s]},{val[run, s]}\n" for s in range(written[run], upto))
+                written[run] = upto
+            tracker.extend(tailer.poll(), val_column=2, train_column=1)
+        live = tracker.summary()
+    batch = analyze_histories(val[:n_live], train[:n_live], lengths[:n_live], patience=15)
+    same = all(np.allclose(live[name], batch[name]) for name in batch)
+    print(f"Tracker after {lengths[:n_live].sum():,} streamed steps matches the batch analysis: {same}\n")
+
+    benchmark()
@@ -0,0 +1,256 @@
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# |tracking signal| above this means the model needs retraining (as in example.py)
+TRACKING_SIGNAL_LIMIT = 4.0
+
+
+def _prefix(x):
+    """Prefix sums with a leading 0 along the last axis: window sums are differences of two entries"""
+    out = np.zeros(x.shape[:-1] + (x.shape[-1] + 1,))
+    np.cumsum(x, axis=-1, out=out[..., 1:])
+    return out
+
+
+def _rolling_sum(x, window):
+    prefix = _prefix(x)
+    return prefix[..., window:] - prefix[..., :-window]
+
+
+def expanding_naive_scale(y, season=7):
+    """Seasonal-naive MAE over y[..., :t + 1] for every t (nan until there are `season` + 1 points)"""
+    y = np.asarray(y, dtype=np.float64)
+    diffs = np.zeros(y.shape)
+    diffs[..., season:] = np.abs(y[..., season:] - y[..., :-season])
+    count = np.arange(y.shape[-1]) + 1 - season
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, np.cumsum(diffs, axis=-1) / count, np.nan)
+
+
+def windowed_metrics(y_true, y_pred, window=7, season=7, threshold=TRACKING_SIGNAL_LIMIT):
+    """MAE, bias, SMAPE, MASE and tracking signal over every trailing window of one-step forecasts
+
+    Works along the last axis, so (n_series, T) arrays are scored in one
+    call. Window sums come from prefix sums (O(1) per window, whatever
+    the window length). MASE divides by the seasonal-naive MAE of all
+    actuals seen up to the window end. Entry i describes the window that
+    ends at time `window - 1 + i`. "alarm" marks windows with
+    |tracking signal| > threshold. For unbiased errors the tracking signal
+    spreads like sqrt(window), so a limit of 4 suits short windows (about
+    a week of daily data).
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    if y_true.shape[-1] < window:
+        raise ValueError(f"Need at least {window} points for a window of {window}")
+    error = y_pred - y_true
+    abs_error = np.abs(error)
+    denom = np.abs(y_true) + np.abs(y_pred)
+    ratio = np.divide(abs_error, denom, out=np.zeros_like(abs_error), where=denom > 0)
+
+    error_sum = _rolling_sum(error, window)
+    mae = _rolling_sum(abs_error, window) / window
+    scale = expanding_naive_scale(y_true, season)[..., window - 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tracking_signal = error_sum / mae
+        return {
+            "end": np.arange(window - 1, y_true.shape[-1]),
+            "mae": mae,
+            "bias": error_sum / window,
+            "smape": 100 * _rolling_sum(ratio, window) / window,
+            "mase": mae / scale,
+            "tracking_signal": tracking_signal,
+            "alarm": np.abs(tracking_signal) > threshold,
+        }
+
+
+def alarm_onsets(alarm):
+    """Indices where an alarm starts (False -> True transitions) along the last axis of a 1D array"""
+    alarm = np.asarray(alarm, dtype=bool)
+    return np.flatnonzero(alarm & ~np.concatenate([[False], alarm[:-1]]))
+
+
+def make_origins(n_points, initial, horizon, step=1):
+    """Forecast origins for a rolling-origin backtest: train on y[:o], forecast y[o:o + horizon]"""
+    return np.arange(initial, n_points - horizon + 1, step)
+
+
+def seasonal_naive_forecasts(y, origins, horizon, season=7):
+    """(n_origins, horizon) seasonal-naive forecasts: y[o + h] is predicted by the last observed season"""
+    y = np.asarray(y, dtype=np.float64)
+    steps = np.arange(horizon)
+    return y[origins[:, None] - season + steps % season]
+
+
+def rolling_origin_backtest(y, forecasts, origins, season=7):
+    """Score (n_origins, horizon) forecasts made at each origin against the actuals that followed
+
+    Actual windows are a zero-copy `sliding_window_view` of y. MASE at
+    each origin uses the seasonal-naive scale of the training part y[:o]
+    only, read from a prefix sum, so there is no look-ahead. Returns
+    per-origin metrics, per-horizon-step MAE and the overall means.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    forecasts = np.asarray(forecasts, dtype=np.float64)
+    origins = np.asarray(origins, dtype=np.int64)
+    horizon = forecasts.shape[1]
+    if origins.min() <= season:
+        raise ValueError(f"Every origin needs more than season={season} training points")
+    actuals = sliding_window_view(y, horizon)[origins]      # (n_origins, horizon) view
+
+    error = forecasts - actuals
+    abs_error = np.abs(error)
+    denom = np.abs(actuals) + np.abs(forecasts)
+    ratio = np.divide(abs_error, denom, out=np.zeros_like(abs_error), where=denom > 0)
+    scale = expanding_naive_scale(y, season)[origins - 1]
+
+    mae = abs_error.mean(axis=1)
+    per_origin = {
+        "origin": origins,
+        "mae": mae,
+        "bias": error.mean(axis=1),
+        "smape": 100 * ratio.mean(axis=1),
+        "mase": mae / scale,
+        "tracking_signal": error.sum(axis=1) / mae,
+    }
+    return {
+        "per_origin": per_origin,
+        "mae_by_step": abs_error.mean(axis=0),
+        "mean": {name: float(np.nanmean(values)) for name, values in per_origin.items() if name != "origin"},
+    }
+
+
+class StreamingWindowMetrics:
+    """O(1)-per-observation windowed metrics and drift alarm for a live forecast stream
+
+    Keeps running sums over the last `window` errors (values leaving the
+    window are subtracted) and an expanding seasonal-naive scale. Sums
+    are rebuilt from the buffer every `window` updates, so rounding
+    cannot build up. Matches `windowed_metrics` at every step.
+    """
+
+    def __init__(self, window=7, season=7, threshold=TRACKING_SIGNAL_LIMIT):
+        self.window = window
+        self.season = season
+        self.threshold = threshold
+        self._buffer = deque()                 # (error, abs error, smape ratio) in the window
+        self._error_sum = self._abs_sum = self._ratio_sum = 0.0
+        self._recent = deque(maxlen=season)    # last `season` actuals for the naive scale
+        self._naive_sum = 0.0
+        self._naive_count = 0
+        self._since_rebuild = 0
+        self.n = 0
+        self.alarm = False
+
+    def update(self, actual, forecast):
+        """Add one observation; returns the current window metrics (None until the window is full)"""
+        error = forecast - actual
+        abs_error = abs(error)
+        denom = abs(actual) + abs(forecast)
+        ratio = abs_error / denom if denom > 0 else 0.0
+        self._buffer.append((error, abs_error, ratio))
+        self._error_sum += error
+        self._abs_sum += abs_error
+        self._ratio_sum += ratio
+        if len(self._buffer) > self.window:
+            old_error, old_abs, old_ratio = self._buffer.popleft()
+            self._error_sum -= old_error
+            self._abs_sum -= old_abs
+            self._ratio_sum -= old_ratio
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._error_sum, self._abs_sum, self._ratio_sum = (sum(column) for column in zip(*self._buffer))
+            self._since_rebuild = 0
+
+        if len(self._recent) == self.season:
+            self._naive_sum += abs(actual - self._recent[0])
+            self._naive_count += 1
+        self._recent.append(actual)
+        self.n += 1
+        if len(self._buffer) < self.window:
+            return None
+
+        error_sum, ratio_sum = self._error_sum, self._ratio_sum
+        mae = self._abs_sum / self.window
+        scale = self._naive_sum / self._naive_count if self._naive_count else float("nan")
+        tracking_signal = error_sum / mae if mae > 0 else float("nan")
+        self.alarm = abs(tracking_signal) > self.threshold
+        return {
+            "mae": mae,
+            "bias": error_sum / self.window,
+            "smape": 100 * ratio_sum / self.window,
+            "mase": mae / scale if scale > 0 else float("nan"),
+            "tracking_signal": tracking_signal,
+            "alarm": self.alarm,
+        }
+
+
+def benchmark(n_points=100_000, window=28):
+    """Prefix-sum windows vs recomputing every window from scratch"""
+    import time
+
+    rng = np.random.default_rng(42)
+    y_true = 100 + 10 * np.sin(2 * np.pi * np.arange(n_points) / 7) + rng.normal(0, 2, n_points)
+    y_pred = y_true + rng.normal(0, 3, n_points)
+
+    start = time.perf_counter()
+    slow_ts = np.empty(n_points - window + 1)
+    for i in range(len(slow_ts)):
+        e = y_pred[i:i + window] - y_true[i:i + window]
+        slow_ts[i] = e.sum() / np.abs(e).mean()
+        np.mean(np.abs(e) / (np.abs(y_true[i:i + window]) + np.abs(y_pred[i:i + window])))
+    slow = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = windowed_metrics(y_true, y_pred, window)
+    fast = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stream = StreamingWindowMetrics(window)
+    for actual, forecast in zip(y_true.tolist(), y_pred.tolist()):
+        stream.update(actual, forecast)
+    streamed = time.perf_counter() - start
+
+    print(f"--- Benchmark ({n_points:,} points, window {window}) ---")
+    print(f"Recompute every window: {slow:.2f} s")
+    print(f"Prefix sums:            {fast * 1000:.1f} ms ({slow / fast:.0f}x)")
+    print(f"Streaming updates:      {streamed / n_points * 1e6:.1f} µs per observation")
+    print(f"Same tracking signal: {np.allclose(result['tracking_signal'], slow_ts)}")
+
+
+if __name__ == "__main__":
+    print("=== Rolling-Origin Backtest ===\n")
+    rng = np.random.default_rng(42)
+    n = 400
+    t = np.arange(n)
+    y = 50 + 0.1 * t + 10 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 2, n)
+
+    # One-step forecasts that start over-forecasting at t = 250 (e.g. after a demand shift)
+    y_pred = y + rng.normal(0, 2, n) + np.where(t >= 250, 3.0, 0.0)
+    windows = windowed_metrics(y, y_pred, window=7)
+    before, after = windows["alarm"][windows["end"] < 250], windows["alarm"][windows["end"] >= 256]
+    first = windows["end"][alarm_onsets(windows["alarm"])]
+    print(f"--- Windowed metrics (window=7) ---")
+    print(f"Windows with |TS| > {TRACKING_SIGNAL_LIMIT:g}: {before.mean():.0%} before the shift, "
+          f"{after.mean():.0%} after it (first alarm after the shift: t = {first[first >= 250][0]})")
+
+    stream = StreamingWindowMetrics(window=7)
+    streamed = [stream.update(a, f) for a, f in zip(y, y_pred)][6:]
+    same = np.allclose([s["tracking_signal"] for s in streamed], windows["tracking_signal"])
+    print(f"Streaming (O(1) per point) matches batch windows: {same}\n")
+
+    # Multi-step backtest: retrain at every 7th origin, forecast 14 days ahead
+    origins = make_origins(n, initial=56, horizon=14, step=7)
+    naive = rolling_origin_backtest(y, seasonal_naive_forecasts(y, origins, 14), origins)
+    drifted = seasonal_naive_forecasts(y, origins, 14) + 0.1 * 7 * (np.arange(14) // 7 + 1)
+    trended = rolling_origin_backtest(y, drifted, origins)
+    print(f"--- Rolling-origin backtest ({len(origins)} origins, horizon 14) ---")
+    for name, result in (("seasonal naive", naive), ("naive + trend", trended)):
+        m = result["mean"]
+        print(f"{name:>15}: MASE {m['mase']:.3f}  SMAPE {m['smape']:.2f}%  bias {m['bias']:+.2f}  "
+              f"MAE step 1/14: {result['mae_by_step'][0]:.2f}/{result['mae_by_step'][-1]:.2f}")
+    print()
+
+    benchmark()
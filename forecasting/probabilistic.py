@@ -0,0 +1,166 @@
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+
+def open_quantile_forecasts(source):
+    """Quantile forecast tensor as an array; `.npy` paths are memory-mapped"""
+    if isinstance(source, (str, os.PathLike)):
+        return np.load(source, mmap_mode="r")
+    return source
+
+
+def symmetric_intervals(quantiles):
+    """Central intervals from quantile pairs (tau, 1 - tau), e.g. 0.05/0.95 -> 90%"""
+    quantiles = np.round(np.asarray(quantiles, dtype=np.float64), 10)
+    intervals = {}
+    for i, low in enumerate(quantiles):
+        match = np.flatnonzero(np.isclose(quantiles, 1 - low))
+        if low < 0.5 and len(match):
+            intervals[round(1 - 2 * low, 10)] = (i, int(match[0]))
+    return intervals
+
+
+def crps_weights(quantiles):
+    """Weight of each quantile level in CRPS = 2 ∫ pinball_τ dτ: the τ-range it covers, normalised
+
+    Level i stands for (τ[i-1] + τ[i]) / 2 .. (τ[i] + τ[i+1]) / 2, with 0
+    and 1 as outer neighbours. Evenly spaced levels get equal weights.
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    if np.any(np.diff(quantiles) <= 0):
+        raise ValueError("Quantile levels must be strictly increasing")
+    padded = np.concatenate([[0.0], quantiles, [1.0]])
+    weights = (padded[2:] - padded[:-2]) / 2
+    return weights / weights.sum()
+
+
+def pinball(y_true, q_pred, quantiles):
+    """Pinball loss for every quantile in one broadcast: (..., H) actuals vs (..., H, Q) forecasts"""
+    error = np.asarray(y_true)[..., None] - q_pred
+    return np.maximum(quantiles * error, (quantiles - 1) * error)
+
+
+def score_quantile_forecasts(y_true, q_pred, quantiles, chunk_size=4_096, per_series=False):
+    """Pinball loss, interval coverage/width and approximate CRPS for a (series, horizon, quantile) tensor
+
+    `q_pred` can be a memory-mapped float32 `.npy` path. Series are read
+    `chunk_size` at a time, cast to float64 and scored in one broadcast,
+    so memory is bounded by the chunk, not the tensor. CRPS is
+    approximated as 2 ∫ pinball_τ dτ with one weight per level (see
+    crps_weights), which tends to the exact CRPS as levels get denser.
+    Intervals come from symmetric quantile pairs (e.g. 0.05 and 0.95 give
+    the 90% interval). "crossing_rate" is the fraction of (series, step) rows
+    whose quantiles are not non-decreasing.
+    """
+    q_pred = open_quantile_forecasts(q_pred)
+    y_true = open_quantile_forecasts(y_true)
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    n_series, horizon, n_quantiles = q_pred.shape
+    if len(quantiles) != n_quantiles:
+        raise ValueError(f"{len(quantiles)} quantile levels for a tensor with {n_quantiles}")
+    if y_true.shape != (n_series, horizon):
+        raise ValueError(f"y_true must be ({n_series}, {horizon}), got {y_true.shape}")
+    intervals = symmetric_intervals(quantiles)
+    weights = crps_weights(quantiles)
+
+    loss_sum = np.zeros(n_quantiles)
+    covered = dict.fromkeys(intervals, 0)
+    width_sum = dict.fromkeys(intervals, 0.0)
+    crossings = 0
+    series_crps = np.empty(n_series) if per_series else None
+
+    for start in range(0, n_series, chunk_size):
+        stop = min(start + chunk_size, n_series)
+        pred = np.asarray(q_pred[start:stop], dtype=np.float64)
+        actual = np.asarray(y_true[start:stop], dtype=np.float64)
+        loss = pinball(actual, pred, quantiles)               # (chunk, H, Q)
+        loss_sum += loss.sum(axis=(0, 1))
+        if per_series:
+            series_crps[start:stop] = 2 * (loss @ weights).mean(axis=1)
+        for level, (lo, hi) in intervals.items():
+            low, high = pred[..., lo], pred[..., hi]
+            covered[level] += int(np.count_nonzero((actual >= low) & (actual <= high)))
+            width_sum[level] += float(np.sum(high - low))
+        crossings += int(np.count_nonzero((np.diff(pred, axis=-1) < 0).any(axis=-1)))
+
+    n_points = n_series * horizon
+    mean_loss = loss_sum / n_points
+    result = {
+        "pinball": dict(zip(quantiles.tolist(), mean_loss.tolist())),
+        "mean_pinball": float(mean_loss.mean()),
+        "crps": float(2 * mean_loss @ weights),
+        "coverage": {level: covered[level] / n_points for level in intervals},
+        "width": {level: width_sum[level] / n_points for level in intervals},
+        "crossing_rate": crossings / n_points,
+    }
+    if per_series:
+        result["series_crps"] = series_crps
+    return result
+
+
+def benchmark(n_series=20_000, horizon=28, quantiles=np.linspace(0.05, 0.95, 19)):
+    """One chunked broadcast vs quantile_loss from example.py called per series and quantile"""
+    import tempfile
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(42)
+    level = rng.uniform(20, 200, (n_series, 1))
+    y_true = level + rng.normal(0, 5, (n_series, horizon))
+    sigma = 5 + rng.uniform(-1, 1, (n_series, 1, 1))
+    offsets = sigma * np.array([NormalDist().inv_cdf(q) for q in quantiles])
+    q_pred = (level[..., None] + offsets).repeat(horizon, axis=1).astype(np.float32)
+
+    def quantile_loss(y_true, y_pred, quantile=0.9):
+        error = y_true - y_pred
+        return np.mean(np.maximum(quantile * error, (quantile - 1) * error))
+
+    n_loop = 2_000
+    start = time.perf_counter()
+    loop = np.array([[quantile_loss(y_true[s], q_pred[s, :, i].astype(np.float64), q)
+                      for i, q in enumerate(quantiles)] for s in range(n_loop)])
+    slow = (time.perf_counter() - start) * n_series / n_loop
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "quantiles.npy")
+        np.save(path, q_pred)
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = score_quantile_forecasts(y_true, path, quantiles, chunk_size=2_048)
+        fast = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        check = score_quantile_forecasts(y_true[:n_loop], q_pred[:n_loop], quantiles)
+
+    same = np.allclose(list(check["pinball"].values()), loop.mean(axis=0))
+    print(f"--- Benchmark ({n_series:,} series × {horizon} steps × {len(quantiles)} quantiles, "
+          f"{q_pred.nbytes / 1024 ** 2:.0f} MB float32 memmap) ---")
+    print(f"quantile_loss per series and quantile: ~{slow:.1f} s (extrapolated from {n_loop:,} series)")
+    print(f"Chunked broadcast:                     {fast:.2f} s (~{slow / fast:.0f}x), "
+          f"peak {peak / 1024 ** 2:.0f} MB")
+    print(f"Same pinball losses: {same}")
+
+
+if __name__ == "__main__":
+    print("=== Probabilistic Forecast Scoring ===\n")
+    rng = np.random.default_rng(42)
+    n_series, horizon = 1_000, 14
+    quantiles = np.array([0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95])
+    z = np.array([NormalDist().inv_cdf(q) for q in quantiles])
+
+    level = rng.uniform(50, 150, (n_series, 1))
+    y_true = level + rng.normal(0, 5, (n_series, horizon))
+    for name, sigma in (("calibrated (σ=5)", 5.0), ("overconfident (σ=2)", 2.0)):
+        q_pred = np.broadcast_to(level[..., None] + sigma * z, (n_series, horizon, len(quantiles)))
+        result = score_quantile_forecasts(y_true, q_pred, quantiles)
+        print(f"--- {name} ---")
+        print("Pinball: " + "  ".join(f"τ={q:g}: {v:.2f}" for q, v in result["pinball"].items()))
+        print(f"CRPS ≈ {result['crps']:.3f} (exact CRPS of a calibrated forecast: {5 / np.sqrt(np.pi):.3f})")
+        for level_ in sorted(result["coverage"]):
+            print(f"{level_:.0%} interval: coverage {result['coverage'][level_]:.1%}, "
+                  f"width {result['width'][level_]:.2f}")
+        print()
+
+    benchmark()
@@ -1,5 +1,409 @@
-def main():
-    print("Hello from fun-with-evaluation!")
+"""Evaluation engine: run metric tasks as a DAG on a process pool and write columnar results
+
+    python main.py                                 # every metric task, results.json
+    python main.py regression forecasting -o out.json
+    python main.py classification --plot           # also renders PNGs
+    python main.py --format parquet -o results/    # needs pyarrow
+    python main.py --cache .eval_cache             # unchanged tasks are read back
+    python main.py --list | --cold-start
+
+Domain modules are imported only inside the task that needs them, in the
+worker that runs it, so a numbers-only run never loads matplotlib and
+only the CV task loads scikit-learn.
+"""
+import argparse
+import ast
+import glob
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import pathlib
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_module(domain, module):
+    """Import a flat sibling module from a domain folder on first use
+
+    Modules in a folder import each other by bare name, so the folder goes
+    on sys.path. A name already taken by another folder's module (e.g.
+    streaming_metrics) is loaded from its file under a qualified name.
+    """
+    folder = os.path.join(ROOT, domain)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    loaded = sys.modules.get(module)
+    if loaded is not None and os.path.dirname(os.path.abspath(loaded.__file__)) != folder:
+        name = f"{domain}_{module}"
+        if name not in sys.modules:
+            spec = importlib.util.spec_from_file_location(name, os.path.join(folder, f"{module}.py"))
+            sys.modules[name] = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(sys.modules[name])
+        return sys.modules[name]
+    return importlib.import_module(module)
+
+
+def _row(**values):
+    """One-row table from scalars"""
+    return {name: [value] for name, value in values.items()}
+
+
+# --- Tasks: task(config, inputs) -> {table name: {column: 1D values}} ----------------------------
+# Tasks named "data:..." produce inputs for other tasks and are not written out.
+
+def data_classification(config, inputs):
+    import numpy as np
+    rng = np.random.default_rng(config["seed"])
+    y_true = rng.integers(0, 2, config["size"])
+    y_score = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1)
+    return {"y_true": y_true, "y_score": y_score}
+
+
+def task_classification(config, inputs):
+    data = inputs["data:classification"]
+    accumulator = load_module("classification", "streaming_metrics").ConfusionMatrixAccumulator()
+    accumulator.update(data["y_true"], (data["y_score"] > 0.5).astype(int))
+    curves = load_module("classification", "curves").binary_curves(data["y_true"], data["y_score"], max_points=200)
+    return {
+        "summary": _row(**accumulator.summary(), roc_auc=curves["roc_auc"], pr_auc=curves["pr_auc"],
+                        average_precision=curves["average_precision"]),
+        "roc_curve": {"fpr": curves["fpr"], "tpr": curves["tpr"]},
+        "pr_curve": {"recall": curves["recall"], "precision": curves["precision"]},
+    }
+
+
+def task_classification_ci(config, inputs):
+    data = inputs["data:classification"]
+    bootstrap_ci = load_module("utils", "bootstrap").bootstrap_ci
+    y_pred = (data["y_score"] > 0.5).astype(int)
+    intervals = bootstrap_ci(data["y_true"], y_pred, metrics=("accuracy", "f1"), n_resamples=500,
+                             sampling="poisson", seed=config["seed"])
+    names = list(intervals)
+    return {"intervals": {"metric": names, **{key: [intervals[n][key] for n in names]
+                                               for key in ("estimate", "low", "high", "std")}}}
+
+
+def task_regression(config, inputs):
+    import numpy as np
+    rng = np.random.default_rng(config["seed"])
+    y_true = rng.normal(50, 10, config["size"])
+    y_pred = y_true + rng.normal(0, 3, config["size"])
+    accumulator = load_module("regression", "streaming_metrics").RegressionAccumulator().update(y_true, y_pred)
+    summary = accumulator.summary()
+    residual, abs_error = summary.pop("residual_quantiles"), summary.pop("abs_error_quantiles")
+    return {
+        "summary": _row(**summary),
+        "quantiles": {"quantile": list(residual), "residual": list(residual.values()),
+                      "abs_error": list(abs_error.values())},
+    }
+
+
+def task_forecasting(config, inputs):
+    import numpy as np
+    rng = np.random.default_rng(config["seed"])
+    n_series, length = max(config["size"] // 100, 10), 100
+    t = np.arange(length)
+    actuals = rng.uniform(20, 200, (n_series, 1)) + 10 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 2, (n_series, length))
+    forecasts = actuals + rng.normal(0, 3, (n_series, length))
+    per_series = load_module("forecasting", "batch_metrics").ForecastEvaluator(season=7).evaluate(actuals, forecasts)
+    windows = load_module("forecasting", "backtest").windowed_metrics(actuals[0], forecasts[0], window=7)
+    return {
+        "per_series": {"series": np.arange(n_series), **per_series},
+        "windows_series_0": {name: windows[name] for name in ("end", "mae", "mase", "tracking_signal", "alarm")},
+    }
+
+
+def task_cv(config, inputs):
+    import numpy as np
+    cross_validation = load_module("utils", "cross_validation")
+    rng = np.random.default_rng(config["seed"])
+    n = min(config["size"], 20_000)
+    X = rng.standard_normal((n, 5))
+    y = (X[:, 0] + 0.5 * rng.standard_normal(n) > 0).astype(int)
+    flip_rates = (0.05, 0.1, 0.2)
+    scores = [cross_validation.cross_validate_mock(X, y, n_splits=5, flip_rate=rate, n_repeats=2, n_workers=1)
+              for rate in flip_rates]
+    return {"scores": {f"flip_{rate:g}": s for rate, s in zip(flip_rates, scores)}}
+
+
+def task_model_comparison(config, inputs):
+    import numpy as np
+    scores = inputs["cv"]["scores"]
+    names = list(scores)
+    result = load_module("utils", "model_comparison").compare_models(
+        np.array([scores[name] for name in names]), names, test_train_ratio=1 / 4, n_splits=5)
+    return {"leaderboard": result["leaderboard"]}
+
+
+def task_nlp(config, inputs):
+    import numpy as np
+    corpus_metrics = load_module("nlp", "corpus_metrics")
+    references, candidates = corpus_metrics.mock_corpus(max(config["size"] // 20, 100), seed=config["seed"])
+    scored = corpus_metrics.CorpusScorer(references, max_n=4).score(candidates)
+    log_probs = np.log(np.random.default_rng(config["seed"]).uniform(0.01, 1.0, config["size"]))
+    accumulator = load_module("nlp", "streaming_perplexity").PerplexityAccumulator().update(log_probs)
+    return {
+        "summary": _row(bleu=scored["bleu"], brevity_penalty=scored["brevity_penalty"],
+                        perplexity=accumulator.perplexity),
+        "precisions": {"n": np.arange(1, len(scored["precisions"]) + 1), "precision": scored["precisions"]},
+    }
+
+
+def task_detection(config, inputs):
+    detection = load_module("computer_vision", "detection")
+    evaluator = detection.DetectionEvaluator()
+    evaluator.update_batch(list(detection.mock_detections(max(config["size"] // 100, 10), seed=config["seed"])))
+    result = evaluator.compute()
+    classes = sorted(result["per_class"])
+    return {
+        "summary": _row(mAP=result["mAP"], mAP_50=result["mAP_50"], mAP_75=result["mAP_75"],
+                        recall=result["recall"]),
+        "per_class": {"class": classes,
+                      "ap": [float(result["per_class"][c]["ap"].mean()) for c in classes],
+                      "n_gt": [result["per_class"][c]["n_gt"] for c in classes]},
+    }
+
+
+def task_plots(config, inputs):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4))
+    roc, pr = inputs["classification"]["roc_curve"], inputs["classification"]["pr_curve"]
+    axes[0].plot(roc["fpr"], roc["tpr"])
+    axes[0].set_xlabel("False Positive Rate")
+    axes[0].set_ylabel("True Positive Rate")
+    axes[0].set_title("ROC Curve")
+    axes[1].plot(pr["recall"], pr["precision"])
+    axes[1].set_xlabel("Recall")
+    axes[1].set_ylabel("Precision")
+    axes[1].set_title("Precision-Recall Curve")
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    path = os.path.join(config["plot_dir"], "classification_curves.png")
+    plt.savefig(path)
+    plt.close(fig)
+    return {"files": {"path": [path]}}
+
+
+# Config entries that only say where files go; they never change a task's tables
+OUTPUT_CONFIG = ("plot_dir",)
+# Tasks run for the files they write, so a cache never skips them
+FILE_TASKS = {"plots"}
+
+# name -> (dependencies, function)
+TASKS = {
+    "data:classification": ((), data_classification),
+    "classification": (("data:classification",), task_classification),
+    "classification_ci": (("data:classification",), task_classification_ci),
+    "regression": ((), task_regression),
+    "forecasting": ((), task_forecasting),
+    "cv": ((), task_cv),
+    "model_comparison": (("cv",), task_model_comparison),
+    "nlp": ((), task_nlp),
+    "detection": ((), task_detection),
+    "plots": (("classification",), task_plots),
+}
+DEFAULT_TASKS = [name for name in TASKS if not name.startswith("data:") and name != "plots"]
+
+
+def task_sources(name):
+    """The task function plus every .py file in the domain folders it loads modules from
+
+    Folders are found from the task's load_module("domain", ...) calls.
+    Whole folders are taken because modules import their siblings (e.g.
+    detection imports boxes). Part of the cache key, so editing a metric
+    module invalidates the tasks that use it.
+    """
+    fn = TASKS[name][1]
+    domains = sorted({node.args[0].value for node in ast.walk(ast.parse(inspect.getsource(fn)))
+                      if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "load_module"
+                      and node.args and isinstance(node.args[0], ast.Constant)})
+    files = [pathlib.Path(path) for domain in domains
+             for path in sorted(glob.glob(os.path.join(ROOT, domain, "*.py")))]
+    return [fn, files]
+
+
+def resolve(names):
+    """Requested tasks plus everything they depend on, in dependency order"""
+    order, state = [], {}
+
+    def visit(name, path):
+        if name not in TASKS:
+            raise ValueError(f"Unknown task {name!r}; choose from {', '.join(DEFAULT_TASKS + ['plots'])}")
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        for dependency in TASKS[name][0]:
+            visit(dependency, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+    return order
+
+
+def _run_task(name, config, inputs):
+    start = time.perf_counter()
+    result = TASKS[name][1](config, inputs)
+    return result, time.perf_counter() - start
+
+
+def run_tasks(names, config, n_workers=None, cache=None):
+    """Run tasks as soon as their dependencies finish; returns ({task: tables}, {task: seconds})
+
+    Each task runs in a fresh worker process (one task per child), so
+    imports stay lazy and flat module names from different folders
+    cannot clash. `n_workers=0` runs everything in this process, in order.
+    With a utils/result_cache.ResultCache, a task whose config and input
+    tables are unchanged is read back instead of run (0 seconds). The key
+    also covers the task's code and metric modules (task_sources), output
+    locations are left out of it, and FILE_TASKS always run.
+    """
+    order = resolve(names)
+    results, seconds, keys = {}, {}, {}
+    key_config = {name: value for name, value in config.items() if name not in OUTPUT_CONFIG}
+
+    def from_cache(name):
+        if cache is None or name in FILE_TASKS:
+            return False
+        keys[name] = cache.key(f"task:{name}", {d: results[d] for d in TASKS[name][0]},
+                               {**key_config, "sources": task_sources(name)})
+        tables = cache.get(keys[name])
+        if tables is None:
+            return False
+        results[name], seconds[name] = tables, 0.0
+        return True
+
+    def finish(name, outcome):
+        results[name], seconds[name] = outcome
+        if name in keys:
+            cache.set(keys[name], results[name], metric=f"task:{name}")
+
+    if n_workers == 0:
+        for name in order:
+            if not from_cache(name):
+                finish(name, _run_task(name, config, {d: results[d] for d in TASKS[name][0]}))
+        return results, seconds
+
+    pending, running = list(order), {}
+    with ProcessPoolExecutor(n_workers, max_tasks_per_child=1) as pool:
+        while pending or running:
+            for name in [n for n in pending if all(d in results for d in TASKS[n][0])]:
+                pending.remove(name)
+                if not from_cache(name):
+                    inputs = {d: results[d] for d in TASKS[name][0]}
+                    running[pool.submit(_run_task, name, config, inputs)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), future.result())
+    return results, seconds
+
+
+def _columns(value):
+    """Column values as plain lists (numpy arrays and scalars included)"""
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    return [v.tolist() if hasattr(v, "tolist") else v for v in value]
+
+
+def write_results(results, path, fmt="json", meta=None):
+    """Write every task table: one columnar JSON file, or one Parquet file per table in a directory"""
+    tables = {f"{task}/{table}": {column: _columns(values) for column, values in columns.items()}
+              for task, task_tables in results.items() if not task.startswith("data:")
+              for table, columns in task_tables.items()}
+    if fmt == "json":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"meta": meta or {}, "tables": tables}, f, indent=1, allow_nan=True)
+    elif fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow); use --format json") from None
+        os.makedirs(path, exist_ok=True)
+        for name, columns in tables.items():
+            pq.write_table(pa.table(columns), os.path.join(path, name.replace("/", "__") + ".parquet"))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta or {}, f, indent=1)
+    else:
+        raise ValueError(f"fmt must be 'json' or 'parquet', got {fmt!r}")
+    return path
+
+
+def cold_start(repeats=3):
+    """Seconds to start Python and load the engine vs. importing what the example scripts import"""
+    import subprocess
+
+    def best(code):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    return {
+        "python": best("pass"),
+        "engine": best("import main"),
+        "engine + regression task": best(
+            "import main; main.run_tasks(['regression'], {'size': 1000, 'seed': 0}, n_workers=0)"),
+        "example imports (sklearn, matplotlib, seaborn)": best(
+            "import numpy, sklearn.metrics, matplotlib.pyplot, seaborn"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run evaluation metric tasks and write columnar results")
+    parser.add_argument("tasks", nargs="*", help=f"tasks to run (default: {' '.join(DEFAULT_TASKS)})")
+    parser.add_argument("-o", "--output", default="results.json", help="output file (json) or directory (parquet)")
+    parser.add_argument("--format", choices=("json", "parquet"), default="json")
+    parser.add_argument("--size", type=int, default=100_000, help="rows of mock data per task")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0 = run in this process)")
+    parser.add_argument("--cache", metavar="DIR", help="reuse results of unchanged tasks from this cache directory")
+    parser.add_argument("--plot", action="store_true", help="also render plots next to the output")
+    parser.add_argument("--list", action="store_true", help="list tasks and exit")
+    parser.add_argument("--cold-start", action="store_true", help="measure start-up time and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (deps, _) in TASKS.items():
+            if not name.startswith("data:"):
+                print(f"{name:<18} needs: {', '.join(d for d in deps if not d.startswith('data:')) or '-'}")
+        return
+    if args.cold_start:
+        for label, seconds in cold_start().items():
+            print(f"{label:<48} {seconds * 1000:6.0f} ms")
+        return
+
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+    names = list(args.tasks or DEFAULT_TASKS) + (["plots"] if args.plot else [])
+    config = {"size": args.size, "seed": args.seed,
+              "plot_dir": os.path.dirname(os.path.abspath(args.output)) if args.format == "json" else args.output}
+    if args.plot:
+        os.makedirs(config["plot_dir"], exist_ok=True)      # plots are drawn before results are written
+    start = time.perf_counter()
+    cache = load_module("utils", "result_cache").ResultCache(args.cache) if args.cache else None
+    results, seconds = run_tasks(names, config, args.workers, cache)
+    elapsed = time.perf_counter() - start
+    meta = {"tasks": resolve(names), "seconds": seconds, "wall_seconds": elapsed, "config": config}
+    write_results(results, args.output, args.format, meta)
+    for name in resolve(names):
+        print(f"{name:<20} {seconds[name]:6.2f} s")
+    print(f"{len(results)} tasks in {elapsed:.2f} s -> {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,305 @@
+import asyncio
+import heapq
+import inspect
+import os
+import time
+
+import numpy as np
+
+from inference_benchmark import arrival_schedule, run_benchmark
+
+
+def poisson_arrivals(rate, duration=None, n_requests=None, seed=0):
+    """Arrival times in seconds from 0 for a Poisson stream of `rate` requests/second"""
+    n_requests = n_requests or int(rate * duration)
+    return arrival_schedule(n_requests, rate, "poisson", seed) / 1e9
+
+
+def load_trace(source):
+    """Arrival times in seconds from a trace, shifted to start at 0
+
+    `source` is an array of timestamps, a `.npy` file or a text file with
+    one timestamp per line (e.g. request times from a gateway log).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = np.load(source) if str(source).endswith(".npy") else np.loadtxt(source, ndmin=1)
+    arrivals = np.sort(np.asarray(source, dtype=np.float64))
+    return arrivals - arrivals[0]
+
+
+def fit_service_time(infer, batch_sizes=(1, 2, 4, 8, 16, 32, 64), n_requests=20):
+    """Measure the median batch latency of `infer(payloads)` per batch size; returns seconds(batch_size)
+
+    Sizes between and beyond the measured ones are linearly interpolated
+    and extrapolated, so the simulator can explore any max batch size.
+    """
+    sizes = np.asarray(batch_sizes, dtype=np.float64)
+    seconds = np.array([run_benchmark(lambda n: infer([None] * n), int(size), n_requests=n_requests,
+                                      n_warmup=3)["p50_ms"] / 1e3 for size in sizes])
+    slope, intercept = np.polyfit(sizes, seconds, 1)
+
+    def service_time(batch_size):
+        if sizes[0] <= batch_size <= sizes[-1]:
+            return float(np.interp(batch_size, sizes, seconds))
+        return float(intercept + slope * batch_size)
+    service_time.table = dict(zip(sizes.astype(int).tolist(), seconds.tolist()))
+    return service_time
+
+
+def simulate_batching(arrivals, service_time, max_batch_size=32, max_wait=0.005, n_workers=1):
+    """Discrete-event simulation of dynamic batching; returns per-request latencies and batch sizes
+
+    A batch opens at its first request. It is ready when it holds
+    `max_batch_size` requests or its first request has waited `max_wait`
+    seconds, and it starts on the first free worker. Requests that arrive
+    before the start join it, up to the size limit. This is the rule
+    DynamicBatcher follows. Each step handles a whole batch, using
+    searchsorted on the sorted arrivals, so a sweep of many settings over
+    100k requests takes seconds.
+    """
+    arrivals = np.asarray(arrivals, dtype=np.float64)
+    n = len(arrivals)
+    latencies = np.empty(n)
+    sizes = []
+    free = [0.0] * n_workers                       # heap of worker free times
+    i = 0
+    while i < n:
+        full_at = arrivals[i + max_batch_size - 1] if i + max_batch_size <= n else np.inf
+        ready = min(full_at, arrivals[i] + max_wait)
+        start = max(ready, heapq.heappop(free))
+        j = min(int(np.searchsorted(arrivals, start, side="right")), i + max_batch_size)
+        done = start + service_time(j - i)
+        heapq.heappush(free, done)
+        latencies[i:j] = done - arrivals[i:j]
+        sizes.append(j - i)
+        i = j
+    return latencies, np.array(sizes)
+
+
+def summarize(arrivals, latencies, batch_sizes):
+    """p50/p95/p99 latency (ms), achieved throughput and mean batch size"""
+    completion = np.asarray(arrivals) + latencies
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1e3
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "throughput_rps": len(latencies) / completion.max(),
+        "mean_batch": float(np.mean(batch_sizes)),
+    }
+
+
+def batching_frontier(service_time, rates, max_batch_sizes=(1, 4, 8, 16, 32, 64),
+                      max_waits=(0.0, 0.002, 0.005, 0.01, 0.02), duration=30.0, arrivals="poisson",
+                      n_workers=1, seed=0):
+    """Simulate every rate × max batch size × max wait; returns a columnar table
+
+    `arrivals="poisson"` draws `duration` seconds of Poisson arrivals at
+    each rate (same seed, so configurations see the same stream). A trace
+    (array of arrival times) is replayed time-compressed or stretched to
+    each target rate.
+    """
+    rows = []
+    for rate in rates:
+        if isinstance(arrivals, str):
+            stream = poisson_arrivals(rate, duration, seed=seed)
+        else:
+            trace = np.asarray(arrivals, dtype=np.float64)
+            stream = trace * (len(trace) / trace[-1]) / rate
+        for max_batch_size in max_batch_sizes:
+            for max_wait in max_waits:
+                latencies, sizes = simulate_batching(stream, service_time, max_batch_size, max_wait, n_workers)
+                rows.append({"rate": rate, "max_batch_size": max_batch_size, "max_wait_ms": max_wait * 1e3,
+                             **summarize(stream, latencies, sizes)})
+    return {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+
+def pareto_frontier(table):
+    """Indices of rows no other row beats on both throughput (higher) and p99 latency (lower)"""
+    order = np.lexsort((table["p99_ms"], -table["throughput_rps"]))    # best throughput first
+    best_p99 = np.minimum.accumulate(table["p99_ms"][order])
+    keep = np.r_[True, table["p99_ms"][order][1:] < best_p99[:-1]]
+    return np.sort(order[keep])
+
+
+def tune_for_sla(table, sla_p99_ms):
+    """Per rate, the setting with the lowest p99 among those meeting the SLA (None if none does)
+
+    Also returns, per (max batch size, max wait), the highest simulated
+    rate that stays under the SLA.
+    """
+    ok = table["p99_ms"] <= sla_p99_ms
+    best = {}
+    for rate in np.unique(table["rate"]):
+        rows = np.flatnonzero((table["rate"] == rate) & ok)
+        best[float(rate)] = int(rows[np.argmin(table["p99_ms"][rows])]) if len(rows) else None
+    capacity = {}
+    for bs, wait in {(b, w) for b, w in zip(table["max_batch_size"].tolist(), table["max_wait_ms"].tolist())}:
+        rows = (table["max_batch_size"] == bs) & (table["max_wait_ms"] == wait) & ok
+        capacity[(bs, wait)] = float(table["rate"][rows].max()) if rows.any() else 0.0
+    return best, dict(sorted(capacity.items()))
+
+
+class _Request:
+    __slots__ = ("payload", "arrival", "future")
+
+    def __init__(self, payload, arrival, future):
+        self.payload, self.arrival, self.future = payload, arrival, future
+
+
+class DynamicBatcher:
+    """asyncio server stand-in that groups concurrent requests into batches for `infer`
+
+    `infer(payloads)` takes a list and returns one output per payload. It
+    can be sync (run in a thread, like a blocking model call) or async.
+    `await batcher.submit(payload)` resolves to that payload's output.
+    Batches close at `max_batch_size` requests or after the first request
+    has waited `max_wait` seconds. At most `n_workers` batches run at
+    once, and requests that arrive while all workers are busy join the
+    waiting batch (the rule simulate_batching models).
+    """
+
+    def __init__(self, infer, max_batch_size=32, max_wait=0.005, n_workers=1):
+        self.infer = infer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.n_workers = n_workers
+        self.batch_sizes = []
+        self._queue = None
+        self._collector = None
+
+    async def __aenter__(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.n_workers)
+        self._running = set()
+        self._collector = asyncio.create_task(self._collect())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._collector.cancel()
+        await asyncio.gather(self._collector, *self._running, return_exceptions=True)
+
+    async def submit(self, payload=None):
+        loop = asyncio.get_running_loop()
+        request = _Request(payload, loop.time(), loop.create_future())
+        self._queue.put_nowait(request)
+        return await request.future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0].arrival + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        try:
+            payloads = [request.payload for request in batch]
+            if inspect.iscoroutinefunction(self.infer):
+                outputs = await self.infer(payloads)
+            else:
+                outputs = await asyncio.to_thread(self.infer, payloads)
+            self.batch_sizes.append(len(batch))
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+        except Exception as error:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(error)
+        finally:
+            self._slots.release()
+
+
+async def replay(batcher, arrivals):
+    """Submit one request at each arrival time (open loop); returns latencies in seconds from arrival"""
+    loop = asyncio.get_running_loop()
+    latencies = np.empty(len(arrivals))
+
+    async def request(i, at):
+        delay = at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await batcher.submit()
+        latencies[i] = loop.time() - at         # from the scheduled arrival, not the actual send
+
+    async with batcher:
+        origin = loop.time() + 0.05
+        await asyncio.gather(*(request(i, origin + t) for i, t in enumerate(arrivals)))
+    return latencies
+
+
+def benchmark(n_requests=200_000, rate=2_000):
+    """Event simulation vs replaying the same stream through DynamicBatcher in real time"""
+    service_time = lambda size: 0.002 + 0.0001 * size
+    arrivals = poisson_arrivals(rate, n_requests=n_requests)
+
+    start = time.perf_counter()
+    latencies, sizes = simulate_batching(arrivals, service_time, 32, 0.002)
+    fast = time.perf_counter() - start
+
+    print(f"--- Benchmark ({n_requests:,} requests at {rate:,}/s, max batch 32, max wait 2 ms) ---")
+    print(f"Real-time replay: would take {arrivals[-1]:.0f} s")
+    print(f"Event simulation: {fast:.2f} s ({arrivals[-1] / fast:.0f}x), "
+          f"p99 {np.percentile(latencies, 99) * 1e3:.2f} ms, mean batch {sizes.mean():.1f}")
+
+
+if __name__ == "__main__":
+    from example import mock_inference
+
+    print("=== Dynamic Batching Simulator ===\n")
+
+    # GPU-like cost: a fixed 4 ms per call plus 0.2 ms per request, so batching pays off
+    def gpu_like_inference(payloads):
+        time.sleep(0.004)
+        return mock_inference(len(payloads), delay=0.0002)
+
+    print("--- Measured service time ---")
+    service_time = fit_service_time(gpu_like_inference, batch_sizes=(1, 8, 32, 64))
+    print("  ".join(f"batch {size}: {seconds * 1e3:.1f} ms" for size, seconds in service_time.table.items()))
+    print()
+
+    sla_ms = 25.0
+    table = batching_frontier(service_time, rates=(100, 400, 800, 1600, 2400),
+                              max_batch_sizes=(1, 8, 16, 32, 64), max_waits=(0.0, 0.002, 0.005, 0.01))
+    best, capacity = tune_for_sla(table, sla_ms)
+    print(f"--- Best setting per request rate (p99 SLA {sla_ms:g} ms, Poisson arrivals) ---")
+    print(f"{'rate':>6} {'max batch':>9} {'max wait':>9} {'p50 ms':>7} {'p99 ms':>7} {'mean batch':>10}")
+    for rate, row in best.items():
+        if row is None:
+            print(f"{rate:>6.0f}  no setting meets the SLA")
+            continue
+        print(f"{rate:>6.0f} {table['max_batch_size'][row]:>9} {table['max_wait_ms'][row]:>7.0f}ms "
+              f"{table['p50_ms'][row]:>7.2f} {table['p99_ms'][row]:>7.2f} {table['mean_batch'][row]:>10.1f}")
+
+    print("\n--- Highest rate under the SLA per setting ---")
+    for (bs, wait), max_rate in capacity.items():
+        if wait in (0.0, 5.0):
+            print(f"max batch {bs:>2}, max wait {wait:>2.0f} ms: {max_rate:>5.0f} req/s")
+    frontier = pareto_frontier(table)
+    print(f"Pareto frontier (throughput vs p99): {len(frontier)} of {len(table['rate'])} settings\n")
+
+    print("--- Simulation vs real asyncio batcher (1600 req/s for 2 s) ---")
+    arrivals = poisson_arrivals(1600, duration=2.0, seed=1)
+    for bs, wait in ((8, 0.0), (32, 0.002)):
+        simulated, _ = simulate_batching(arrivals, service_time, bs, wait)
+        batcher = DynamicBatcher(gpu_like_inference, max_batch_size=bs, max_wait=wait)
+        measured = asyncio.run(replay(batcher, arrivals))
+        print(f"max batch {bs:>2}, wait {wait * 1e3:.0f} ms: simulated p99 {np.percentile(simulated, 99) * 1e3:8.2f} ms, "
+              f"measured p99 {np.percentile(measured, 99) * 1e3:8.2f} ms, "
+              f"mean batch {np.mean(batcher.batch_sizes):.1f}")
+    print()
+
+    benchmark()
@@ -0,0 +1,278 @@
+from itertools import chain
+
+import numpy as np
+
+# 64-bit polynomial rolling hash; uint64 arithmetic wraps modulo 2**64.
+# N-grams are compared by hash, so a collision (~n²/2**64) could merge two n-grams.
+HASH_BASE = np.uint64(0x100000001B3)
+SENTENCE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class Vocabulary:
+    """Interns tokens to dense integer ids, shared by references and every system"""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def encode_corpus(self, sentences):
+        """Flatten tokenized sentences into (ids, offsets); sentence i is ids[offsets[i]:offsets[i+1]]"""
+        sentences = list(sentences)
+        lengths = np.fromiter((len(s) for s in sentences), dtype=np.int64, count=len(sentences))
+        ids = self.ids
+        tokens = [ids.setdefault(token, len(ids)) for token in chain.from_iterable(sentences)]
+        offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return np.asarray(tokens, dtype=np.int64), offsets
+
+
+def ngram_hashes(ids, offsets, max_n=4):
+    """Hash every n-gram of every sentence for n = 1..max_n in one rolling pass
+
+    Returns a list with one (sentence_index, hash) pair of arrays per order.
+    Order n is built from order n-1 as h_n[i] = h_{n-1}[i] * BASE + id[i+n-1],
+    so no token is revisited; n-grams crossing sentence boundaries are dropped.
+    """
+    lengths = np.diff(offsets)
+    sentence = np.repeat(np.arange(len(lengths)), lengths)
+    remaining = offsets[1:][sentence] - np.arange(len(ids))    # tokens left in the sentence
+    symbols = ids.astype(np.uint64) + np.uint64(1)
+
+    orders = []
+    hashes = symbols
+    for n in range(1, max_n + 1):
+        if n > 1:
+            hashes = hashes[:-1] * HASH_BASE + symbols[n - 1:]
+        valid = remaining[:len(hashes)] >= n
+        orders.append((sentence[:len(hashes)][valid], hashes[valid]))
+    return orders
+
+
+def count_ngrams(sentence, hashes):
+    """Collapse (sentence, hash) occurrences into sorted unique keys with counts
+
+    The sentence index is folded into the hash so a single uint64 sort
+    groups identical n-grams of the same sentence. Returns (keys,
+    sentence, counts), one entry per distinct n-gram per sentence.
+    """
+    keys = hashes + sentence.astype(np.uint64) * SENTENCE_MIX
+    order = np.argsort(keys)
+    keys, sentence = keys[order], sentence[order]
+    new_run = np.ones(len(keys), dtype=bool)
+    new_run[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(new_run)
+    counts = np.diff(np.r_[starts, len(keys)])
+    return keys[starts], sentence[starts], counts
+
+
+def clipped_matches(cand_runs, ref_runs, n_sentences):
+    """Per-sentence sum of min(candidate count, reference count) over shared n-grams"""
+    cand_keys, cand_sentence, cand_counts = cand_runs
+    ref_keys, _, ref_counts = ref_runs
+    if len(ref_keys) == 0 or len(cand_keys) == 0:
+        return np.zeros(n_sentences, dtype=np.int64)
+    idx = np.minimum(np.searchsorted(ref_keys, cand_keys), len(ref_keys) - 1)
+    shared = ref_keys[idx] == cand_keys
+    matched = np.minimum(cand_counts[shared], ref_counts[idx[shared]])
+    return np.bincount(cand_sentence[shared], weights=matched, minlength=n_sentences).astype(np.int64)
+
+
+def ngram_totals(lengths, max_n=4):
+    """(S, max_n) number of n-grams in each sentence"""
+    n = np.arange(1, max_n + 1)
+    return np.maximum(lengths[:, None] - n[None, :] + 1, 0)
+
+
+def corpus_bleu_from_counts(matches, cand_totals, cand_length, ref_length):
+    """Corpus BLEU from summed clipped matches / n-gram totals and corpus lengths"""
+    matches = np.asarray(matches, dtype=np.float64)
+    cand_totals = np.asarray(cand_totals, dtype=np.float64)
+    precisions = np.divide(matches, cand_totals, out=np.zeros_like(matches), where=cand_totals > 0)
+    if cand_length == 0:
+        brevity_penalty = 0.0
+    elif cand_length > ref_length:
+        brevity_penalty = 1.0
+    else:
+        brevity_penalty = float(np.exp(1 - ref_length / cand_length))
+    if np.any(precisions == 0):
+        return 0.0, precisions, brevity_penalty
+    bleu = brevity_penalty * float(np.exp(np.mean(np.log(precisions))))
+    return bleu, precisions, brevity_penalty
+
+
+class NgramStats:
+    """Mergeable sufficient statistics for corpus BLEU and ROUGE-N
+
+    Everything is an integer count, so merging shards in any order and
+    then scoring gives bit-identical results to a single pass.
+    """
+
+    def __init__(self, max_n=4):
+        self.max_n = max_n
+        self.matches = np.zeros(max_n, dtype=np.int64)
+        self.cand_totals = np.zeros(max_n, dtype=np.int64)
+        self.ref_totals = np.zeros(max_n, dtype=np.int64)
+        self.cand_length = 0
+        self.ref_length = 0
+        self.n_sentences = 0
+
+    def update(self, matches, cand_totals, ref_totals, cand_lengths, ref_lengths):
+        """Add per-sentence (S, max_n) counts and (S,) lengths"""
+        self.matches += np.asarray(matches).sum(axis=0)
+        self.cand_totals += np.asarray(cand_totals).sum(axis=0)
+        self.ref_totals += np.asarray(ref_totals).sum(axis=0)
+        self.cand_length += int(np.sum(cand_lengths))
+        self.ref_length += int(np.sum(ref_lengths))
+        self.n_sentences += len(cand_lengths)
+        return self
+
+    def merge(self, other):
+        """Add another shard's statistics in place"""
+        if other.max_n != self.max_n:
+            raise ValueError(f"Cannot merge max_n={other.max_n} into max_n={self.max_n}")
+        self.matches += other.matches
+        self.cand_totals += other.cand_totals
+        self.ref_totals += other.ref_totals
+        self.cand_length += other.cand_length
+        self.ref_length += other.ref_length
+        self.n_sentences += other.n_sentences
+        return self
+
+    def __add__(self, other):
+        return NgramStats(self.max_n).merge(self).merge(other)
+
+    def __eq__(self, other):
+        return (isinstance(other, NgramStats) and self.max_n == other.max_n
+                and np.array_equal(self.matches, other.matches)
+                and np.array_equal(self.cand_totals, other.cand_totals)
+                and np.array_equal(self.ref_totals, other.ref_totals)
+                and (self.cand_length, self.ref_length, self.n_sentences)
+                == (other.cand_length, other.ref_length, other.n_sentences))
+
+    def compute(self):
+        """Corpus BLEU, n-gram precisions, brevity penalty and corpus ROUGE-N recall"""
+        bleu, precisions, brevity_penalty = corpus_bleu_from_counts(
+            self.matches, self.cand_totals, self.cand_length, self.ref_length)
+        matches = self.matches.astype(np.float64)
+        rouge = np.divide(matches, self.ref_totals, out=np.zeros_like(matches), where=self.ref_totals > 0)
+        return {
+            "bleu": bleu,
+            "precisions": precisions,
+            "brevity_penalty": brevity_penalty,
+            "rouge_n": rouge,
+            "n_sentences": self.n_sentences,
+        }
+
+
+class CorpusScorer:
+    """BLEU-1..N and ROUGE-1..N for a whole corpus against fixed references
+
+    Reference n-gram counts are computed once at construction and reused
+    for every candidate set scored afterwards (e.g. several systems).
+    """
+
+    def __init__(self, references, max_n=4, vocab=None):
+        self.max_n = max_n
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        ids, offsets = self.vocab.encode_corpus(references)
+        self.ref_lengths = np.diff(offsets)
+        self.ref_totals = ngram_totals(self.ref_lengths, max_n)
+        self._ref_runs = [count_ngrams(*order) for order in ngram_hashes(ids, offsets, max_n)]
+
+    def __len__(self):
+        return len(self.ref_lengths)
+
+    def match_counts(self, candidates):
+        """(matches, cand_totals, cand_lengths) per sentence; matches is (S, max_n)"""
+        ids, offsets = self.vocab.encode_corpus(candidates)
+        cand_lengths = np.diff(offsets)
+        if len(cand_lengths) != len(self):
+            raise ValueError(f"Got {len(cand_lengths)} candidates for {len(self)} references")
+        matches = np.empty((len(self), self.max_n), dtype=np.int64)
+        for n, order in enumerate(ngram_hashes(ids, offsets, self.max_n)):
+            matches[:, n] = clipped_matches(count_ngrams(*order), self._ref_runs[n], len(self))
+        return matches, ngram_totals(cand_lengths, self.max_n), cand_lengths
+
+    def stats(self, candidates):
+        """Mergeable NgramStats for these candidates (see NgramStats)"""
+        matches, cand_totals, cand_lengths = self.match_counts(candidates)
+        return NgramStats(self.max_n).update(matches, cand_totals, self.ref_totals, cand_lengths, self.ref_lengths)
+
+    def score(self, candidates):
+        """Corpus BLEU (with brevity penalty) plus sentence-level BLEU-n precision and ROUGE-n recall
+
+        `bleu_n[i, n-1]` equals `bleu_score(ref_i, cand_i, n)` and
+        `rouge_n[i, n-1]` equals `rouge_n(ref_i, cand_i, n)` from example.py.
+        """
+        matches, cand_totals, cand_lengths = self.match_counts(candidates)
+        corpus = NgramStats(self.max_n).update(
+            matches, cand_totals, self.ref_totals, cand_lengths, self.ref_lengths).compute()
+        zeros = np.zeros(matches.shape)
+        return {
+            "bleu": corpus["bleu"],
+            "precisions": corpus["precisions"],
+            "brevity_penalty": corpus["brevity_penalty"],
+            "bleu_n": np.divide(matches, cand_totals, out=zeros.copy(), where=cand_totals > 0),
+            "rouge_n": np.divide(matches, self.ref_totals, out=zeros, where=self.ref_totals > 0),
+        }
+
+
+def mock_corpus(n_sentences, vocab_size=5_000, seed=42):
+    """Random (references, candidates) where candidates replace ~30% of reference tokens"""
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab_size)]
+    references, candidates = [], []
+    for length in rng.integers(8, 30, n_sentences):
+        ref = rng.zipf(1.3, length) % vocab_size
+        cand = np.where(rng.random(length) < 0.3, rng.integers(0, vocab_size, length), ref)
+        references.append([words[i] for i in ref])
+        candidates.append([words[i] for i in cand[:max(1, length - rng.integers(0, 3))]])
+    return references, candidates
+
+
+def benchmark(n_sentences=100_000):
+    """Time BLEU-1..4 + ROUGE-1/2 for every sentence: corpus scorer vs example.py functions"""
+    import time
+    from example import bleu_score, rouge_n
+
+    references, candidates = mock_corpus(n_sentences)
+    _, other_system = mock_corpus(n_sentences, seed=7)
+
+    start = time.perf_counter()
+    scorer = CorpusScorer(references, max_n=4)
+    result = scorer.score(candidates)
+    fast = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer.score(other_system)  # a second system reuses the cached reference counts
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive_bleu = np.array([[bleu_score(r, c, n) for n in range(1, 5)] for r, c in zip(references, candidates)])
+    naive_rouge = np.array([[rouge_n(r, c, n) for n in (1, 2)] for r, c in zip(references, candidates)])
+    naive = time.perf_counter() - start
+
+    same = np.allclose(result["bleu_n"], naive_bleu) and np.allclose(result["rouge_n"][:, :2], naive_rouge)
+    print(f"--- Benchmark ({n_sentences:,} sentence pairs, BLEU-1..4 + ROUGE-1/2) ---")
+    print(f"example.py functions:         {naive:.2f} s")
+    print(f"Corpus scorer (incl. refs):   {fast:.2f} s  ({naive / fast:.1f}x)")
+    print(f"Second system (cached refs):  {cached:.2f} s  ({naive / cached:.1f}x)")
+    print(f"Sentence scores identical: {same}")
+
+
+if __name__ == "__main__":
+    print("=== Corpus BLEU / ROUGE ===\n")
+    references = ["the cat sat on the mat".split(), "machine learning is a subset of artificial intelligence".split()]
+    candidates = ["the cat is on the mat".split(), "machine learning is part of artificial intelligence".split()]
+
+    scorer = CorpusScorer(references)
+    result = scorer.score(candidates)
+    print(f"Corpus BLEU-4:   {result['bleu']:.3f}")
+    print(f"Precisions:      {np.round(result['precisions'], 3)}")
+    print(f"Brevity penalty: {result['brevity_penalty']:.3f}")
+    print(f"Sentence BLEU-1/2: {np.round(result['bleu_n'][:, :2], 3).tolist()}")
+    print(f"Sentence ROUGE-1/2: {np.round(result['rouge_n'][:, :2], 3).tolist()}\n")
+
+    benchmark()
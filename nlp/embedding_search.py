@@ -0,0 +1,173 @@
+import numpy as np
+
+
+def normalize_rows(vectors, out=None, block_rows=65_536):
+    """L2-normalise rows block by block (zero rows stay zero); `out` may be a memmap"""
+    if out is None:
+        out = np.empty(vectors.shape, dtype=np.float32)
+    for start in range(0, len(vectors), block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)    # may be the caller's data
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        out[start:start + block_rows] = np.divide(block, norms, out=np.zeros_like(block), where=norms > 0)
+    return out
+
+
+def _merge_top_k(best_scores, best_idx, scores, idx, k):
+    """Keep the k largest of two (Q, ·) candidate sets; unordered within the k"""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    idx = np.concatenate([best_idx, idx], axis=1)
+    if scores.shape[1] <= k:
+        return scores, idx
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(idx, keep, axis=1)
+
+
+class EmbeddingIndex:
+    """Cosine-similarity search over a vocabulary matrix normalised once
+
+    The normalised matrix is stored as float32 or float16 (in memory or as
+    a memory-mapped `.npy`), and queries are answered with one matrix
+    multiply per vocabulary block plus `argpartition` top-k, so 1M+ word
+    vocabularies never need a full (queries × vocab) score matrix.
+    """
+
+    def __init__(self, normalized, words=None, block_rows=65_536, max_block_scores=1 << 23):
+        self.vectors = normalized
+        self.words = list(words) if words is not None else None
+        self.word_index = {w: i for i, w in enumerate(self.words)} if self.words is not None else None
+        self.block_rows = block_rows
+        self.max_block_scores = max_block_scores   # caps the (queries × block) score matrix
+
+    @classmethod
+    def build(cls, vectors, words=None, dtype=np.float32, path=None, block_rows=65_536):
+        """Normalise `vectors` once; with `path`, the result is written to a memory-mapped .npy"""
+        if path is None:
+            out = np.empty(vectors.shape, dtype=dtype)
+        else:
+            out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=vectors.shape)
+        normalize_rows(vectors, out, block_rows)
+        if path is not None:
+            out.flush()
+        return cls(out, words, block_rows)
+
+    @classmethod
+    def load(cls, path, words=None, block_rows=65_536):
+        """Open a normalised matrix saved by `build(..., path=...)` without reading it into RAM"""
+        return cls(np.load(path, mmap_mode="r"), words, block_rows)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def lookup(self, words):
+        return np.array([self.word_index[w] for w in words], dtype=np.int64)
+
+    def search(self, queries, k=10, exclude=None):
+        """Top-k rows by cosine similarity for each query vector
+
+        `exclude` is an optional (Q, E) array of row indices to skip per
+        query (-1 entries are ignored). Returns (indices, scores), each
+        (Q, k), sorted by descending similarity.
+        """
+        queries = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        n_queries = len(queries)
+        k = min(k, len(self))
+        best_scores = np.empty((n_queries, 0), dtype=np.float32)
+        best_idx = np.empty((n_queries, 0), dtype=np.int64)
+        exclude = None if exclude is None else np.atleast_2d(np.asarray(exclude, dtype=np.int64))
+        block_rows = max(k, min(self.block_rows, self.max_block_scores // max(1, n_queries)))
+
+        for start in range(0, len(self), block_rows):
+            block = np.asarray(self.vectors[start:start + block_rows], dtype=np.float32)
+            scores = queries @ block.T
+            if exclude is not None:
+                rows, cols = np.nonzero((exclude >= start) & (exclude < start + len(block)))
+                scores[rows, exclude[rows, cols] - start] = -np.inf
+            kb = min(k, len(block))
+            if kb == 1:
+                top = scores.argmax(axis=1)[:, None]    # much cheaper than a partition
+            else:
+                np.negative(scores, out=scores)
+                top = np.argpartition(scores, kb - 1, axis=1)[:, :kb]
+                np.negative(scores, out=scores)
+            best_scores, best_idx = _merge_top_k(
+                best_scores, best_idx, np.take_along_axis(scores, top, axis=1), top + start, k)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def nearest(self, words, k=10):
+        """Top-k neighbours of vocabulary words, excluding the word itself"""
+        idx = self.lookup(words)
+        queries = np.asarray(self.vectors[idx], dtype=np.float32)
+        return self.search(queries, k, exclude=idx[:, None])
+
+    def analogy(self, a, b, c, k=1):
+        """Solve a : b :: c : ? (3CosAdd, e.g. man : king :: woman : queen) for index arrays"""
+        a, b, c = (np.asarray(x, dtype=np.int64) for x in (a, b, c))
+        va, vb, vc = (np.asarray(self.vectors[x], dtype=np.float32) for x in (a, b, c))
+        return self.search(vb - va + vc, k, exclude=np.stack([a, b, c], axis=1))
+
+    def evaluate_analogies(self, questions, batch_size=1_024):
+        """Accuracy on (a, b, c, d) word questions; returns (accuracy, n_scored, n_skipped)"""
+        known = [q for q in questions if all(w in self.word_index for w in q)]
+        if not known:
+            return float("nan"), 0, len(questions)
+        idx = np.array([[self.word_index[w] for w in q] for q in known], dtype=np.int64)
+        correct = 0
+        for start in range(0, len(idx), batch_size):
+            batch = idx[start:start + batch_size]
+            predicted, _ = self.analogy(batch[:, 0], batch[:, 1], batch[:, 2], k=1)
+            correct += int(np.sum(predicted[:, 0] == batch[:, 3]))
+        return correct / len(idx), len(idx), len(questions) - len(known)
+
+
+def read_analogy_file(path, lowercase=True):
+    """Questions from a word2vec-style analogy file (`: section` headers, then `a b c d` lines)"""
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith(":"):
+                continue
+            words = line.lower().split() if lowercase else line.split()
+            if len(words) == 4:
+                questions.append(tuple(words))
+    return questions
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    print("=== Embedding Search (top-k cosine) ===\n")
+    rng = np.random.default_rng(42)
+    vocab_size, dim, n_pairs = 200_000, 100, 2_000
+
+    # Random vocabulary with planted analogies: y_i = x_i + relation + noise
+    vectors = rng.standard_normal((vocab_size, dim)).astype(np.float32)
+    relation = rng.standard_normal(dim).astype(np.float32) * 3
+    x_idx, y_idx = np.arange(n_pairs), np.arange(n_pairs, 2 * n_pairs)
+    vectors[y_idx] = vectors[x_idx] + relation + rng.standard_normal((n_pairs, dim)).astype(np.float32) * 0.1
+    words = [f"w{i}" for i in range(vocab_size)]
+    questions = [(words[x_idx[i]], words[y_idx[i]], words[x_idx[j]], words[y_idx[j]])
+                 for i, j in rng.integers(0, n_pairs, (5_000, 2)) if i != j]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype, path in ((np.float32, None), (np.float16, os.path.join(tmp, "vocab_f16.npy"))):
+            start = time.perf_counter()
+            index = EmbeddingIndex.build(vectors, words, dtype=dtype, path=path)
+            if path is not None:
+                index = EmbeddingIndex.load(path, words)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            accuracy, n_scored, _ = index.evaluate_analogies(questions)
+            elapsed = time.perf_counter() - start
+            storage = "memmap" if path else "in-memory"
+            print(f"{np.dtype(dtype).name} {storage}: normalise {build:.2f} s, "
+                  f"{n_scored:,} analogies at {n_scored / elapsed:,.0f} queries/s, accuracy {accuracy:.3f}")
+            del index
+
+    index = EmbeddingIndex.build(vectors, words)
+    neighbours, scores = index.nearest(["w0"], k=3)
+    print(f"\nNearest to w0: {[words[i] for i in neighbours[0]]} ({', '.join(f'{x:.3f}' for x in scores[0])})")
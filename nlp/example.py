@@ -32,55 +32,61 @@ def perplexity(probabilities):
     log_probs = np.log(probabilities)
     return np.exp(-np.mean(log_probs))
 
-print("=== NLP Metrics ===\n")
+def cosine_similarity(a, b):
+    """Cosine similarity between two embedding vectors"""
+    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
-# Machine Translation / Text Generation
-print("--- BLEU Score (Machine Translation) ---")
-reference = "the cat sat on the mat".split()
-candidate = "the cat is on the mat".split()
+def main():
+    print("=== NLP Metrics ===\n")
 
-bleu1 = bleu_score(reference, candidate, n=1)
-bleu2 = bleu_score(reference, candidate, n=2)
+    # Machine Translation / Text Generation
+    print("--- BLEU Score (Machine Translation) ---")
+    reference = "the cat sat on the mat".split()
+    candidate = "the cat is on the mat".split()
 
-print(f"Reference:  {' '.join(reference)}")
-print(f"Candidate:  {' '.join(candidate)}")
-print(f"BLEU-1: {bleu1:.3f}")
-print(f"BLEU-2: {bleu2:.3f}\n")
+    bleu1 = bleu_score(reference, candidate, n=1)
+    bleu2 = bleu_score(reference, candidate, n=2)
 
-# Summarization
-print("--- ROUGE Score (Summarization) ---")
-ref_summary = "machine learning is a subset of artificial intelligence".split()
-gen_summary = "machine learning is part of artificial intelligence".split()
+    print(f"Reference:  {' '.join(reference)}")
+    print(f"Candidate:  {' '.join(candidate)}")
+    print(f"BLEU-1: {bleu1:.3f}")
+    print(f"BLEU-2: {bleu2:.3f}\n")
 
-rouge1 = rouge_n(ref_summary, gen_summary, n=1)
-rouge2 = rouge_n(ref_summary, gen_summary, n=2)
+    # Summarization
+    print("--- ROUGE Score (Summarization) ---")
+    ref_summary = "machine learning is a subset of artificial intelligence".split()
+    gen_summary = "machine learning is part of artificial intelligence".split()
 
-print(f"Reference:  {' '.join(ref_summary)}")
-print(f"Generated:  {' '.join(gen_summary)}")
-print(f"ROUGE-1: {rouge1:.3f}")
-print(f"ROUGE-2: {rouge2:.3f}\n")
+    rouge1 = rouge_n(ref_summary, gen_summary, n=1)
+    rouge2 = rouge_n(ref_summary, gen_summary, n=2)
 
-# Language Model
-print("--- Perplexity (Language Model) ---")
-np.random.seed(42)
-token_probs = np.random.rand(100) * 0.5 + 0.3
-ppl = perplexity(token_probs)
+    print(f"Reference:  {' '.join(ref_summary)}")
+    print(f"Generated:  {' '.join(gen_summary)}")
+    print(f"ROUGE-1: {rouge1:.3f}")
+    print(f"ROUGE-2: {rouge2:.3f}\n")
 
-print(f"Perplexity: {ppl:.2f}")
-print("Lower perplexity = better language model\n")
+    # Language Model
+    print("--- Perplexity (Language Model) ---")
+    np.random.seed(42)
+    token_probs = np.random.rand(100) * 0.5 + 0.3
+    ppl = perplexity(token_probs)
 
-# Word Embeddings
-print("--- Embedding Quality ---")
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    print(f"Perplexity: {ppl:.2f}")
+    print("Lower perplexity = better language model\n")
+
+    # Word Embeddings
+    print("--- Embedding Quality ---")
+    king = np.random.rand(50)
+    queen = king + np.random.randn(50) * 0.1
+    man = np.random.rand(50)
+
+    sim_king_queen = cosine_similarity(king, queen)
+    sim_king_man = cosine_similarity(king, man)
 
-king = np.random.rand(50)
-queen = king + np.random.randn(50) * 0.1
-man = np.random.rand(50)
+    print(f"Similarity(king, queen): {sim_king_queen:.3f}")
+    print(f"Similarity(king, man):   {sim_king_man:.3f}")
+    print("Higher similarity = more related words")
 
-sim_king_queen = cosine_similarity(king, queen)
-sim_king_man = cosine_similarity(king, man)
 
-print(f"Similarity(king, queen): {sim_king_queen:.3f}")
-print(f"Similarity(king, man):   {sim_king_man:.3f}")
-print("Higher similarity = more related words")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_metrics import CorpusScorer, NgramStats
+
+
+def _tokens(text):
+    return text.split() if isinstance(text, str) else list(text)
+
+
+def iter_line_chunks(path, chunk_size=20_000):
+    """Yield lists of raw JSONL lines, `chunk_size` lines at a time"""
+    chunk = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_lines(lines, max_n=4, reference_key="reference", candidate_key="candidate"):
+    """NgramStats for one chunk of JSONL lines (runs inside the worker processes)"""
+    references, candidates = [], []
+    for line in lines:
+        record = json.loads(line)
+        references.append(_tokens(record[reference_key]))
+        candidates.append(_tokens(record[candidate_key]))
+    return CorpusScorer(references, max_n).stats(candidates)
+
+
+def score_jsonl(path, max_n=4, chunk_size=20_000, n_workers=None,
+                reference_key="reference", candidate_key="candidate"):
+    """Corpus BLEU / ROUGE-N for a JSONL file of {"reference", "candidate"} pairs
+
+    Chunks of raw lines are parsed and scored on a process pool and the
+    integer NgramStats are summed, so results are bit-identical for any
+    `n_workers` (None = all cores, 1 = in-process). At most two chunks
+    per worker are in flight, so the file is streamed, never loaded whole.
+    """
+    n_workers = n_workers or os.cpu_count()
+    total = NgramStats(max_n)
+    chunks = iter_line_chunks(path, chunk_size)
+    args = (max_n, reference_key, candidate_key)
+
+    if n_workers == 1:
+        for lines in chunks:
+            total.merge(score_lines(lines, *args))
+        return total.compute()
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        pending = deque()
+        for lines in chunks:
+            pending.append(pool.submit(score_lines, lines, *args))
+            if len(pending) >= 2 * n_workers:
+                total.merge(pending.popleft().result())
+        while pending:
+            total.merge(pending.popleft().result())
+    return total.compute()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from corpus_metrics import mock_corpus
+
+    print("=== Sharded Multiprocess BLEU / ROUGE ===\n")
+    n_sentences = 200_000
+    references, candidates = mock_corpus(n_sentences)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pairs.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for ref, cand in zip(references, candidates):
+                f.write(json.dumps({"reference": " ".join(ref), "candidate": " ".join(cand)}) + "\n")
+
+        results = {}
+        for n_workers in sorted({1, 2, os.cpu_count()}):
+            start = time.perf_counter()
+            results[n_workers] = score_jsonl(path, n_workers=n_workers)
+            elapsed = time.perf_counter() - start
+            print(f"{n_workers:2d} worker(s): {elapsed:.2f} s ({n_sentences / elapsed:,.0f} pairs/s)")
+
+    single = CorpusScorer(references).score(candidates)
+    print(f"\nCorpus BLEU-4: {single['bleu']:.6f}")
+    identical = all(r["bleu"] == single["bleu"] and (r["precisions"] == single["precisions"]).all()
+                    for r in results.values())
+    print(f"Bit-identical across worker counts and single-process scorer: {identical}")
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+
+
+def open_log_probs(source, dtype=np.float32):
+    """Token log-probs as an array; `.npy` files are memory-mapped, other paths read as raw `dtype` binary"""
+    if isinstance(source, (str, os.PathLike)):
+        if str(source).endswith(".npy"):
+            return np.load(source, mmap_mode="r")
+        return np.memmap(source, dtype=dtype, mode="r")
+    return np.asarray(source)
+
+
+def _kahan_add(total, compensation, value):
+    """One compensated (Kahan) addition; works elementwise on arrays too"""
+    y = value - compensation
+    t = total + y
+    compensation = (t - total) - y
+    return t, compensation
+
+
+class PerplexityAccumulator:
+    """Running perplexity from blocks of token log-probs
+
+    Keeps a Kahan-compensated float64 sum of negative log-likelihood and a
+    token count, so memory is constant however many tokens stream through.
+    Accumulators from different shards can be merged.
+    """
+
+    def __init__(self, log_base=np.e):
+        self.log_scale = float(np.log(log_base))   # converts log_base logs to nats
+        self.nll = 0.0
+        self._compensation = 0.0
+        self.n_tokens = 0
+
+    def update(self, log_probs):
+        """Add a block of log-probabilities (each <= 0)"""
+        log_probs = np.asarray(log_probs)
+        if log_probs.size == 0:
+            return self
+        if log_probs.max() > 0:
+            raise ValueError("Log-probabilities must be <= 0")
+        block_nll = -np.sum(log_probs, dtype=np.float64) * self.log_scale
+        self.nll, self._compensation = _kahan_add(self.nll, self._compensation, block_nll)
+        self.n_tokens += log_probs.size
+        return self
+
+    def merge(self, other):
+        self.nll, self._compensation = _kahan_add(self.nll, self._compensation, other.nll)
+        self._compensation += other._compensation
+        self.n_tokens += other.n_tokens
+        return self
+
+    @property
+    def cross_entropy(self):
+        """Mean negative log-likelihood per token in nats"""
+        return self.nll / self.n_tokens if self.n_tokens else float("nan")
+
+    @property
+    def perplexity(self):
+        return float(np.exp(self.cross_entropy))
+
+
+def stream_perplexity(source, doc_offsets=None, dtype=np.float32, log_base=np.e, block_size=1 << 22):
+    """Corpus and per-document perplexity over a log-prob file, `block_size` tokens at a time
+
+    `doc_offsets` holds document boundaries in token positions (length
+    n_docs + 1, starting at 0). Memory is bounded by the block size plus
+    one float64 pair per document, independent of the token count.
+    """
+    log_probs = open_log_probs(source, dtype)
+    corpus = PerplexityAccumulator(log_base)
+    n = len(log_probs)
+
+    if doc_offsets is not None:
+        doc_offsets = np.asarray(doc_offsets, dtype=np.int64)
+        if doc_offsets[0] != 0 or doc_offsets[-1] != n or np.any(np.diff(doc_offsets) < 0):
+            raise ValueError("doc_offsets must be non-decreasing, start at 0 and end at the token count")
+        n_docs = len(doc_offsets) - 1
+        doc_nll = np.zeros(n_docs)
+        doc_compensation = np.zeros(n_docs)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = np.asarray(log_probs[start:stop])
+        corpus.update(block)
+        if doc_offsets is None:
+            continue
+
+        # Documents overlapping this block and their (possibly partial) spans within it
+        first = np.searchsorted(doc_offsets, start, side="right") - 1
+        last = np.searchsorted(doc_offsets, stop - 1, side="right") - 1
+        seg_start = np.clip(doc_offsets[first:last + 1], start, stop) - start
+        seg_stop = np.clip(doc_offsets[first + 1:last + 2], start, stop) - start
+        nonempty = seg_stop > seg_start
+        partial = np.zeros(len(seg_start))
+        partial[nonempty] = -np.add.reduceat(block.astype(np.float64), seg_start[nonempty])
+        partial *= corpus.log_scale
+
+        docs = slice(first, last + 1)
+        doc_nll[docs], doc_compensation[docs] = _kahan_add(doc_nll[docs], doc_compensation[docs], partial)
+
+    result = {
+        "perplexity": corpus.perplexity,
+        "cross_entropy": corpus.cross_entropy,
+        "n_tokens": corpus.n_tokens,
+    }
+    if doc_offsets is not None:
+        lengths = np.diff(doc_offsets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result["document_perplexity"] = np.exp(doc_nll / lengths)
+    return result
+
+
+if __name__ == "__main__":
+    import math
+    import tempfile
+    import time
+    import tracemalloc
+
+    print("=== Streaming Perplexity ===\n")
+    rng = np.random.default_rng(42)
+    n_tokens, block = 20_000_000, 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Raw float32 log-prob file written in blocks, as an eval job would emit it
+        path = os.path.join(tmp, "log_probs.f32")
+        with open(path, "wb") as f:
+            for _ in range(0, n_tokens, block):
+                np.log(rng.random(block) * 0.5 + 0.3).astype(np.float32).tofile(f)
+        doc_lengths = rng.integers(1, 4_000, n_tokens // 1_000)
+        doc_offsets = np.r_[0, np.cumsum(doc_lengths)]
+        doc_offsets = doc_offsets[doc_offsets < n_tokens]
+        doc_offsets = np.r_[doc_offsets, n_tokens]
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = stream_perplexity(path, doc_offsets, block_size=1 << 20)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        exact = math.exp(-math.fsum(np.memmap(path, dtype=np.float32, mode="r").astype(np.float64)) / n_tokens)
+
+    print(f"Tokens:          {result['n_tokens']:,} ({n_tokens * 4 / 1024 ** 2:.0f} MB file)")
+    print(f"Documents:       {len(doc_offsets) - 1:,}")
+    print(f"Perplexity:      {result['perplexity']:.6f} (exact fsum: {exact:.6f})")
+    print(f"Doc perplexity:  median {np.median(result['document_perplexity']):.3f}")
+    print(f"Time:            {elapsed:.2f} s ({n_tokens / elapsed / 1e6:.0f}M tokens/s)")
+    print(f"Peak memory:     {peak / 1024 ** 2:.1f} MB (block of 1M tokens + per-document sums)")
@@ -1,6 +1,6 @@
 import numpy as np
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import matplotlib.pyplot as plt
+from streaming_metrics import RegressionAccumulator
 
 # Mock regression data
 np.random.seed(42)
@@ -9,12 +9,13 @@ y_pred = y_true + np.random.randn(100) * 3
 
 print("=== Regression Metrics ===\n")
 
-# Calculate metrics
-mse = mean_squared_error(y_true, y_pred)
-rmse = np.sqrt(mse)
-mae = mean_absolute_error(y_true, y_pred)
-r2 = r2_score(y_true, y_pred)
-mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
+# Calculate all metrics in a single pass
+metrics = RegressionAccumulator().update(y_true, y_pred).summary()
+mse = metrics["mse"]
+rmse = metrics["rmse"]
+mae = metrics["mae"]
+r2 = metrics["r2"]
+mape = metrics["mape"]
 
 print(f"MSE:   {mse:.3f}")
 print(f"RMSE:  {rmse:.3f}")
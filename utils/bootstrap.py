@@ -0,0 +1,288 @@
+from statistics import NormalDist
+
+import numpy as np
+
+_NORMAL = NormalDist()
+
+
+# Each metric maps (y_true, y_pred) to per-row columns (n, k) and a finaliser
+# turning weighted column sums (B, k) into one value per replicate. Every
+# resample is then just a weight vector over rows: W (B, n) @ columns (n, k).
+
+def _ratio_metric(column):
+    def build(y_true, y_pred):
+        return np.column_stack([np.ones(len(y_true)), column(y_true, y_pred)])
+    return build, lambda s: s[:, 1] / s[:, 0]
+
+
+def _mape_columns(y_true, y_pred):
+    nonzero = y_true != 0    # zero targets are excluded instead of dividing by zero
+    ape = np.divide(np.abs(y_true - y_pred), np.abs(y_true), out=np.zeros(len(y_true)), where=nonzero)
+    return np.column_stack([nonzero, 100 * ape])
+
+
+def _r2_columns(y_true, y_pred):
+    return np.column_stack([np.ones(len(y_true)), y_true, y_true ** 2, (y_true - y_pred) ** 2])
+
+
+def _r2_finalize(s):
+    total = s[:, 2] - s[:, 1] ** 2 / s[:, 0]
+    return 1 - s[:, 3] / total
+
+
+def _smape_columns(y_true, y_pred):
+    denom = np.abs(y_true) + np.abs(y_pred)
+    ratio = np.divide(np.abs(y_pred - y_true), denom, out=np.zeros(len(y_true)), where=denom > 0)
+    return np.column_stack([np.ones(len(y_true)), 100 * ratio])
+
+
+def _mase_columns(y_true, y_pred, season=7):
+    # Scale is the in-sample seasonal naive MAE of the full series, as in forecasting/example.py
+    scale = np.mean(np.abs(y_true[season:] - y_true[:-season]))
+    return np.column_stack([np.ones(len(y_true)), np.abs(y_true - y_pred) / scale])
+
+
+def _binary_columns(y_true, y_pred):
+    true, pred = y_true > 0, y_pred > 0
+    return np.column_stack([pred, true, true & pred]).astype(np.float64)
+
+
+METRICS = {
+    # classification (labels)
+    "accuracy": _ratio_metric(lambda t, p: t == p),
+    "precision": (_binary_columns, lambda s: s[:, 2] / s[:, 0]),
+    "recall": (_binary_columns, lambda s: s[:, 2] / s[:, 1]),
+    "f1": (_binary_columns, lambda s: 2 * s[:, 2] / (s[:, 0] + s[:, 1])),
+    # regression
+    "mse": _ratio_metric(lambda t, p: (t - p) ** 2),
+    "rmse": (_ratio_metric(lambda t, p: (t - p) ** 2)[0], lambda s: np.sqrt(s[:, 1] / s[:, 0])),
+    "mae": _ratio_metric(lambda t, p: np.abs(t - p)),
+    "r2": (_r2_columns, _r2_finalize),
+    "mape": (_mape_columns, lambda s: s[:, 1] / s[:, 0]),
+    # forecasting
+    "smape": (_smape_columns, lambda s: s[:, 1] / s[:, 0]),
+    "bias": _ratio_metric(lambda t, p: p - t),
+    "mase": (_mase_columns, lambda s: s[:, 1] / s[:, 0]),
+}
+# ROC-AUC needs the score ordering, so it is handled by _weighted_roc_auc
+RANKING_METRICS = ("roc_auc",)
+
+
+def _weighted_roc_auc(y_true, y_score, weights):
+    """ROC-AUC for every row of a (B, n) weight matrix, sorting the scores only once"""
+    order = np.argsort(y_score)[::-1]
+    score, positive = y_score[order], y_true[order] > 0
+    starts = np.flatnonzero(np.r_[True, score[1:] != score[:-1]])    # tie groups
+    w = weights[:, order]
+    pos = np.add.reduceat(w * positive, starts, axis=1)
+    neg = np.add.reduceat(w * ~positive, starts, axis=1)
+    tps, fps = np.cumsum(pos, axis=1), np.cumsum(neg, axis=1)
+    tpr = np.concatenate([np.zeros((len(w), 1)), tps / tps[:, -1:]], axis=1)
+    fpr = np.concatenate([np.zeros((len(w), 1)), fps / fps[:, -1:]], axis=1)
+    return np.sum(np.diff(fpr, axis=1) * (tpr[:, 1:] + tpr[:, :-1]) / 2, axis=1)
+
+
+def _evaluate(names, columns, y_true, y_pred, weights):
+    """Every metric for every weight row: {name: (B,) values}"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = {}
+        for name in names:
+            if name in RANKING_METRICS:
+                out[name] = _weighted_roc_auc(y_true, y_pred, weights)
+            else:
+                out[name] = METRICS[name][1](weights @ columns[name])
+        return out
+
+
+def _multinomial_weights(rng, n_rows, n_resamples):
+    """Resample counts from a (B, n) index draw: row b counts how often each row was picked"""
+    idx = rng.integers(0, n_rows, (n_resamples, n_rows))
+    idx += (np.arange(n_resamples) * n_rows)[:, None]
+    return np.bincount(idx.ravel(), minlength=n_resamples * n_rows).reshape(n_resamples, n_rows).astype(np.float64)
+
+
+def _replicates(names, columns, y_true, y_pred, n_resamples, sampling, rng, max_elements):
+    """Bootstrap replicates of every metric, chunked so no (B, n) block exceeds max_elements"""
+    n = len(y_true)
+    if sampling == "poisson" and not any(name in RANKING_METRICS for name in names):
+        # Poisson(1) weights are independent per row, so huge n is chunked over rows
+        # and only the (B, k) weighted sums are carried between chunks
+        rows_per_chunk = max(1, max_elements // n_resamples)
+        sums = {name: 0.0 for name in names}
+        for start in range(0, n, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n)
+            w = rng.poisson(1.0, (n_resamples, stop - start)).astype(np.float64)
+            for name in names:
+                sums[name] = sums[name] + w @ columns[name][start:stop]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {name: METRICS[name][1](sums[name]) for name in names}
+
+    # Otherwise chunk over replicates; each chunk is one vectorized pass over all metrics
+    per_chunk = max(1, max_elements // max(1, n))
+    parts = []
+    for start in range(0, n_resamples, per_chunk):
+        b = min(per_chunk, n_resamples - start)
+        if sampling == "poisson":
+            w = rng.poisson(1.0, (b, n)).astype(np.float64)
+        else:
+            w = _multinomial_weights(rng, n, b)
+        parts.append(_evaluate(names, columns, y_true, y_pred, w))
+    return {name: np.concatenate([p[name] for p in parts]) for name in names}
+
+
+def _jackknife(names, columns, y_true, y_pred, n_groups, rng, max_elements):
+    """Grouped (delete-a-group) jackknife values for the BCa acceleration
+
+    Leaving out a group subtracts that group's column sums, one bincount
+    per column, from the totals, so no (groups, n) weight matrix is built.
+    ROC-AUC needs weights over rows and builds them a chunk of groups at
+    a time, keeping each block within max_elements.
+    """
+    n = len(y_true)
+    n_groups = min(n_groups, n)
+    group = rng.permutation(n) % n_groups
+    out = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in names:
+            if name in RANKING_METRICS:
+                per_chunk = max(1, max_elements // n)
+                parts = []
+                for first in range(0, n_groups, per_chunk):
+                    left_out = np.arange(first, min(first + per_chunk, n_groups))
+                    weights = (group != left_out[:, None]).astype(np.float64)
+                    parts.append(_weighted_roc_auc(y_true, y_pred, weights))
+                out[name] = np.concatenate(parts)
+            else:
+                column = columns[name]
+                group_sums = np.column_stack([np.bincount(group, weights=column[:, j], minlength=n_groups)
+                                              for j in range(column.shape[1])])
+                out[name] = METRICS[name][1](column.sum(axis=0) - group_sums)
+    return out
+
+
+def _bca_interval(replicates, estimate, jackknife, alpha):
+    """Bias-corrected and accelerated percentile interval (Efron 1987)"""
+    replicates = replicates[np.isfinite(replicates)]
+    below = np.mean(replicates < estimate) + 0.5 * np.mean(replicates == estimate)
+    z0 = _NORMAL.inv_cdf(min(max(below, 1e-10), 1 - 1e-10))
+    diff = np.mean(jackknife) - jackknife
+    denom = 6 * np.sum(diff ** 2) ** 1.5
+    accel = np.sum(diff ** 3) / denom if denom > 0 else 0.0
+
+    quantiles = []
+    for q in (alpha / 2, 1 - alpha / 2):
+        z = _NORMAL.inv_cdf(q)
+        quantiles.append(_NORMAL.cdf(z0 + (z0 + z) / (1 - accel * (z0 + z))))
+    return np.quantile(replicates, quantiles)
+
+
+def bootstrap_ci(y_true, y_pred, metrics=("accuracy",), n_resamples=2_000, confidence=0.95,
+                 method="percentile", sampling="multinomial", seed=0, max_elements=1 << 24,
+                 jackknife_groups=200):
+    """Bootstrap confidence intervals for several metrics at once
+
+    All resamples are drawn together as weights over rows, either counts
+    from a (B, n) index draw ("multinomial") or Poisson(1) weights
+    ("poisson", for huge n), and every metric is evaluated for all
+    replicates with one matrix product per chunk. Work is chunked so no
+    (B, n) block exceeds `max_elements`. `method` is "percentile" or "bca".
+
+    Metric names: accuracy, precision, recall, f1, roc_auc (with scores as
+    y_pred), mse, rmse, mae, r2, mape, smape, bias, mase.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    names = [metrics] if isinstance(metrics, str) else list(metrics)
+    unknown = [m for m in names if m not in METRICS and m not in RANKING_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics {unknown}; choose from {sorted(METRICS) + list(RANKING_METRICS)}")
+    if method not in ("percentile", "bca"):
+        raise ValueError(f"method must be 'percentile' or 'bca', got {method!r}")
+    if sampling not in ("multinomial", "poisson"):
+        raise ValueError(f"sampling must be 'multinomial' or 'poisson', got {sampling!r}")
+
+    rng = np.random.default_rng(seed)
+    columns = {m: METRICS[m][0](y_true, y_pred) for m in names if m in METRICS}
+    estimates = _evaluate(names, columns, y_true, y_pred, np.ones((1, len(y_true))))
+    replicates = _replicates(names, columns, y_true, y_pred, n_resamples, sampling, rng, max_elements)
+    jackknife = None
+    if method == "bca":
+        jackknife = _jackknife(names, columns, y_true, y_pred, jackknife_groups, rng, max_elements)
+
+    alpha = 1 - confidence
+    results = {}
+    for name in names:
+        estimate, values = float(estimates[name][0]), replicates[name]
+        if method == "bca":
+            low, high = _bca_interval(values, estimate, jackknife[name], alpha)
+        else:
+            low, high = np.nanquantile(values, [alpha / 2, 1 - alpha / 2])
+        results[name] = {"estimate": estimate, "low": float(low), "high": float(high),
+                         "std": float(np.nanstd(values)), "replicates": values}
+    return results
+
+
+def benchmark(n_rows=2_000, n_resamples=2_000):
+    """Vectorized bootstrap vs a Python loop of sklearn metric calls per resample"""
+    import time
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+    rng = np.random.default_rng(42)
+    y_true = rng.integers(0, 2, n_rows)
+    y_pred = np.where(rng.random(n_rows) < 0.85, y_true, 1 - y_true)
+    scorers = {"accuracy": accuracy_score, "precision": precision_score,
+               "recall": recall_score, "f1": f1_score}
+
+    start = time.perf_counter()
+    loop = {name: [] for name in scorers}
+    for _ in range(n_resamples):
+        idx = rng.integers(0, n_rows, n_rows)
+        for name, scorer in scorers.items():
+            loop[name].append(scorer(y_true[idx], y_pred[idx]))
+    slow = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = bootstrap_ci(y_true, y_pred, list(scorers), n_resamples=n_resamples)
+    fast = time.perf_counter() - start
+
+    print(f"--- Benchmark ({n_rows:,} rows, {n_resamples:,} resamples, 4 metrics) ---")
+    print(f"sklearn loop: {slow:.2f} s  f1 CI [{np.quantile(loop['f1'], 0.025):.3f}, {np.quantile(loop['f1'], 0.975):.3f}]")
+    print(f"Vectorized:   {fast:.2f} s ({slow / fast:.0f}x)  f1 CI [{result['f1']['low']:.3f}, {result['f1']['high']:.3f}]")
+
+
+if __name__ == "__main__":
+    import time
+
+    print("=== Vectorized Bootstrap Confidence Intervals ===\n")
+    rng = np.random.default_rng(42)
+
+    y_true = rng.integers(0, 2, 2_000)
+    y_pred = np.where(rng.random(2_000) < 0.85, y_true, 1 - y_true)
+    y_score = np.clip(rng.normal(0.4 + 0.2 * y_true, 0.2), 0, 1)
+
+    cls = bootstrap_ci(y_true, y_pred, ["accuracy", "precision", "recall", "f1"], method="bca")
+    auc = bootstrap_ci(y_true, y_score, "roc_auc", n_resamples=1_000, method="bca")
+    print("--- Classification (n=2,000, B=2,000, BCa) ---")
+    for name, r in {**cls, **auc}.items():
+        print(f"{name:>9}: {r['estimate']:.3f}  95% CI [{r['low']:.3f}, {r['high']:.3f}]")
+
+    y_reg = rng.normal(50, 10, 5_000)
+    y_hat = y_reg + rng.normal(0, 3, 5_000)
+    reg = bootstrap_ci(y_reg, y_hat, ["rmse", "mae", "r2", "mape"], method="bca")
+    print("\n--- Regression (n=5,000, B=2,000, BCa) ---")
+    for name, r in reg.items():
+        print(f"{name:>9}: {r['estimate']:.3f}  95% CI [{r['low']:.3f}, {r['high']:.3f}]")
+
+    # Large n: Poisson weights streamed over row chunks, never a full (B, n) matrix
+    n_big = 500_000
+    y_big = rng.normal(0, 1, n_big)
+    start = time.perf_counter()
+    big = bootstrap_ci(y_big, y_big + rng.normal(0, 0.5, n_big), ["mse", "mae"],
+                       n_resamples=200, sampling="poisson")
+    elapsed = time.perf_counter() - start
+    print(f"\n--- Poisson bootstrap (n={n_big:,}, B=200) ---")
+    for name, r in big.items():
+        print(f"{name:>9}: {r['estimate']:.4f}  95% CI [{r['low']:.4f}, {r['high']:.4f}]")
+    print(f"Time: {elapsed:.2f} s\n")
+
+    benchmark()
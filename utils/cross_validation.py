@@ -1,62 +1,75 @@
+from functools import partial
+
 import numpy as np
-from sklearn.model_selection import KFold, StratifiedKFold
-from sklearn.metrics import accuracy_score
-
-def cross_validate_mock(X, y, n_splits=5):
-    """Mock cross-validation"""
-    kf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
-    scores = []
-    
-    for train_idx, val_idx in kf.split(X, y):
-        # Mock predictions
-        y_pred = y[val_idx].copy()
-        flip_idx = np.random.choice(len(val_idx), size=int(len(val_idx) * 0.1), replace=False)
-        y_pred[flip_idx] = 1 - y_pred[flip_idx]
-        
-        score = accuracy_score(y[val_idx], y_pred)
-        scores.append(score)
-    
-    return scores
-
-def statistical_test(scores1, scores2):
-    """Paired t-test for model comparison"""
-    from scipy import stats
-    t_stat, p_value = stats.ttest_rel(scores1, scores2)
-    return t_stat, p_value
-
-print("=== Cross-Validation & Statistical Testing ===\n")
-
-# Mock data
-np.random.seed(42)
-X = np.random.randn(100, 10)
-y = np.random.randint(0, 2, 100)
-
-# Cross-validation
-print("--- K-Fold Cross-Validation ---")
-scores = cross_validate_mock(X, y, n_splits=5)
-
-print(f"Fold scores: {[f'{s:.3f}' for s in scores]}")
-print(f"Mean CV Score: {np.mean(scores):.3f} ± {np.std(scores):.3f}")
-print(f"Min: {np.min(scores):.3f}, Max: {np.max(scores):.3f}\n")
-
-# Model comparison
-print("--- Statistical Significance Testing ---")
-model1_scores = cross_validate_mock(X, y, n_splits=5)
-model2_scores = cross_validate_mock(X, y, n_splits=5)
-
-print(f"Model 1: {np.mean(model1_scores):.3f} ± {np.std(model1_scores):.3f}")
-print(f"Model 2: {np.mean(model2_scores):.3f} ± {np.std(model2_scores):.3f}")
-
-try:
-    from scipy import stats
+
+from cv_runner import cross_validate, nearest_centroid
+from model_comparison import corrected_ttest
+
+def mock_fit_predict(X_train, y_train, X_val, rng, flip_rate=0.1):
+    """Nearest-centroid predictions with a fraction flipped using the fold's own RNG"""
+    y_pred = nearest_centroid(X_train, y_train, X_val, rng)
+    flip_idx = rng.choice(len(y_pred), size=int(len(y_pred) * flip_rate), replace=False)
+    y_pred[flip_idx] = 1 - y_pred[flip_idx]
+    return y_pred
+
+def cross_validate_mock(X, y, n_splits=5, flip_rate=0.1, n_repeats=1, n_workers=1):
+    """Mock cross-validation via cv_runner.cross_validate
+
+    Each fold scores nearest-centroid predictions with `flip_rate` of them flipped, so the
+    scores depend on X. (Before cv_runner, it flipped a fraction of the true labels, which
+    put every fold at about 1 - flip_rate.) The folds run in this process by default: a fold
+    here takes microseconds, so a pool costs far more to start than it saves. Pass
+    `n_workers=None` (all cores) or a count to use one for large X.
+    """
+    results = cross_validate(partial(mock_fit_predict, flip_rate=flip_rate), X, y, ["accuracy"],
+                             n_splits=n_splits, n_repeats=n_repeats, seed=42, n_workers=n_workers)
+    return results["accuracy"].ravel().tolist()
+
+def statistical_test(scores1, scores2, test_train_ratio=0.0):
+    """Paired t-test for model comparison (Nadeau–Bengio corrected when test_train_ratio > 0)
+
+    For many models, pass the whole score matrix to model_comparison.compare_models instead.
+    """
+    t, p = corrected_ttest(np.stack([scores1, scores2]), test_train_ratio)
+    return t[0, 1], p[0, 1]
+
+def main():
+    print("=== Cross-Validation & Statistical Testing ===\n")
+
+    # Mock data
+    rng = np.random.default_rng(42)
+    X = rng.standard_normal((100, 10))
+    y = (X[:, 0] + 0.5 * rng.standard_normal(100) > 0).astype(int)
+
+    # Cross-validation
+    print("--- K-Fold Cross-Validation ---")
+    scores = cross_validate_mock(X, y, n_splits=5)
+
+    print(f"Fold scores: {[f'{s:.3f}' for s in scores]}")
+    print(f"Mean CV Score: {np.mean(scores):.3f} ± {np.std(scores):.3f}")
+    print(f"Min: {np.min(scores):.3f}, Max: {np.max(scores):.3f}\n")
+
+    # Model comparison
+    print("--- Statistical Significance Testing ---")
+    model1_scores = cross_validate_mock(X, y, n_splits=5)
+    model2_scores = cross_validate_mock(X, y, n_splits=5, flip_rate=0.2)
+
+    print(f"Model 1: {np.mean(model1_scores):.3f} ± {np.std(model1_scores):.3f}")
+    print(f"Model 2: {np.mean(model2_scores):.3f} ± {np.std(model2_scores):.3f}")
+
     t_stat, p_value = statistical_test(model1_scores, model2_scores)
     print(f"\nPaired t-test:")
     print(f"t-statistic: {t_stat:.3f}")
     print(f"p-value: {p_value:.3f}")
-    
+
     if p_value < 0.05:
         print("✓ Difference is statistically significant (p < 0.05)")
     else:
         print("✗ No significant difference (p >= 0.05)")
-except ImportError:
-    print("\nNote: Install scipy for statistical testing: pip install scipy")
+
+    # Fold scores share training data, so the plain t-test is overconfident
+    t_stat, p_value = statistical_test(model1_scores, model2_scores, test_train_ratio=1 / 4)
+    print(f"Corrected (Nadeau–Bengio) p-value: {p_value:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import math
+import os
+
+import numpy as np
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def t_two_sided_pvalue(t, df):
+    """Two-sided Student-t p-values for integer `df`, elementwise and without scipy
+
+    Uses the finite trigonometric series for P(|T| < t) that exists for
+    integer degrees of freedom (Abramowitz & Stegun 26.7.3/26.7.4).
+    """
+    t = np.abs(np.asarray(t, dtype=np.float64))
+    df = int(df)
+    if df < 1:
+        raise ValueError("df must be >= 1")
+    theta = np.arctan(t / math.sqrt(df))
+    sin, cos2 = np.sin(theta), np.cos(theta) ** 2
+    term = np.ones_like(t)
+    series = np.ones_like(t)
+    if df % 2:
+        for k in range(1, (df - 1) // 2):
+            term = term * cos2 * (2 * k) / (2 * k + 1)
+            series += term
+        inside = 2 / np.pi * (theta + (sin * np.cos(theta) * series if df > 1 else 0))
+    else:
+        for k in range(1, df // 2):
+            term = term * cos2 * (2 * k - 1) / (2 * k)
+            series += term
+        inside = sin * series
+    p = np.clip(1 - inside, 0.0, 1.0)
+    return np.where(np.isnan(t), np.nan, p)
+
+
+def corrected_ttest(scores, test_train_ratio):
+    """All pairwise Nadeau–Bengio corrected resampled t-tests from a (models × folds) matrix
+
+    For K fold scores the variance of the mean difference is inflated from
+    var/K to (1/K + n_test/n_train) * var, since overlapping training sets
+    make fold scores correlated. Pair variances come from one covariance
+    matrix: var(d_ij) = var_i + var_j - 2 cov_ij. Returns (t, p), both
+    (M, M); t[i, j] > 0 means model i scores higher than model j.
+    With `test_train_ratio=0` this is the ordinary paired t-test.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n_folds = scores.shape[1]
+    if n_folds < 2:
+        raise ValueError("Need at least two folds per model")
+    mean = scores.mean(axis=1)
+    centered = scores - mean[:, None]
+    cov = centered @ centered.T / (n_folds - 1)
+    var = np.diag(cov)
+    diff_var = np.maximum(var[:, None] + var[None, :] - 2 * cov, 0.0)
+    diff_mean = mean[:, None] - mean[None, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = diff_mean / np.sqrt((1 / n_folds + test_train_ratio) * diff_var)
+    t[(diff_var == 0) & (diff_mean == 0)] = 0.0    # identical score vectors: no difference
+    return t, t_two_sided_pvalue(t, n_folds - 1)
+
+
+def _open_predictions(predictions):
+    if isinstance(predictions, (str, os.PathLike)):
+        return np.load(predictions, mmap_mode="r")
+    return np.asarray(predictions)
+
+
+def mcnemar_tests(predictions, y_true, chunk_size=65_536):
+    """All pairwise McNemar tests from a (models × samples) prediction matrix
+
+    `predictions` may be a cached `.npy` path, which is memory-mapped and
+    read `chunk_size` samples at a time. Discordant counts for every pair
+    come from one matrix product per chunk: b[i, j] = #(i right, j wrong).
+    Returns (statistic, p, b), using the continuity-corrected chi-square.
+    """
+    predictions = _open_predictions(predictions)
+    y_true = np.asarray(y_true).ravel()
+    n_models, n_samples = predictions.shape
+    if n_samples != len(y_true):
+        raise ValueError(f"predictions have {n_samples} samples but y_true has {len(y_true)}")
+
+    b = np.zeros((n_models, n_models), dtype=np.int64)
+    for start in range(0, n_samples, chunk_size):
+        # float32 products are exact integers for chunks below 2**24 samples
+        correct = (np.asarray(predictions[:, start:start + chunk_size]) == y_true[start:start + chunk_size])
+        right = correct.astype(np.float32)
+        b += np.rint(right @ (1 - right).T).astype(np.int64)
+
+    discordant = b + b.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        statistic = (np.abs(b - b.T) - 1).clip(min=0) ** 2 / discordant
+    statistic[discordant == 0] = 0.0
+    # chi-square(1) survival function: P(X > s) = erfc(sqrt(s / 2))
+    p = _erfc(np.sqrt(statistic / 2)).astype(np.float64)
+    return statistic, p, b
+
+
+def adjust_pvalues(p, method="holm"):
+    """Holm (family-wise) or Benjamini–Hochberg ("bh", FDR) adjusted p-values, any shape"""
+    p = np.asarray(p, dtype=np.float64)
+    flat = p.ravel()
+    n = len(flat)
+    order = np.argsort(flat, kind="stable")
+    ranked = flat[order]
+    if method == "holm":
+        adjusted = np.maximum.accumulate((n - np.arange(n)) * ranked)
+    elif method == "bh":
+        adjusted = np.minimum.accumulate((n / np.arange(n, 0, -1) * ranked[::-1]))[::-1]
+    else:
+        raise ValueError(f"method must be 'holm' or 'bh', got {method!r}")
+    out = np.empty(n)
+    out[order] = np.minimum(adjusted, 1.0)
+    return out.reshape(p.shape)
+
+
+def _adjust_pairs(p, method):
+    """Adjust the M*(M-1)/2 distinct pairs of a symmetric p matrix and mirror the result"""
+    upper = np.triu_indices(len(p), k=1)
+    adjusted = np.zeros_like(p)
+    adjusted[upper] = adjust_pvalues(p[upper], method)
+    return adjusted + adjusted.T
+
+
+def compare_models(scores, names=None, test_train_ratio=None, n_splits=None, alpha=0.05,
+                   correction="holm", higher_is_better=True):
+    """Leaderboard and pairwise corrected t-tests for a (models × folds) score matrix
+
+    `test_train_ratio` is n_test / n_train per fold; for K-fold CV pass
+    `n_splits` instead and it becomes 1 / (K - 1). P-values are adjusted
+    over all M*(M-1)/2 pairs. The leaderboard is columnar, best model
+    first, with each model's adjusted p-value against the leader and its
+    significant wins and losses.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n_models = len(scores)
+    names = list(names) if names is not None else [f"model_{i}" for i in range(n_models)]
+    if test_train_ratio is None:
+        if n_splits is None:
+            raise ValueError("Pass test_train_ratio or n_splits")
+        test_train_ratio = 1 / (n_splits - 1)
+
+    t, p = corrected_ttest(scores, test_train_ratio)
+    if not higher_is_better:
+        t = -t
+    p_adjusted = _adjust_pairs(p, correction)
+    significant = p_adjusted < alpha
+    np.fill_diagonal(significant, False)
+
+    mean = scores.mean(axis=1)
+    order = np.argsort(-mean if higher_is_better else mean, kind="stable")
+    leader = order[0]
+    leaderboard = {
+        "rank": np.arange(1, n_models + 1),
+        "model": [names[i] for i in order],
+        "mean": mean[order],
+        "std": scores.std(axis=1, ddof=1)[order],
+        "p_vs_best": p_adjusted[leader, order],
+        "wins": (significant & (t > 0)).sum(axis=1)[order],
+        "losses": (significant & (t < 0)).sum(axis=1)[order],
+    }
+    leaderboard["p_vs_best"][0] = 1.0
+    return {"t": t, "p": p, "p_adjusted": p_adjusted, "leaderboard": leaderboard}
+
+
+def format_leaderboard(leaderboard, top=10, alpha=0.05):
+    """Plain-text table of the first `top` leaderboard rows"""
+    lines = [f"{'rank':>4}  {'model':<16} {'mean':>7} {'std':>7} {'p vs best':>10} {'wins':>5} {'losses':>6}"]
+    for i in range(min(top, len(leaderboard["rank"]))):
+        p = leaderboard["p_vs_best"][i]
+        marker = "*" if p < alpha else " "
+        lines.append(f"{leaderboard['rank'][i]:>4}  {leaderboard['model'][i]:<16} "
+                     f"{leaderboard['mean'][i]:>7.4f} {leaderboard['std'][i]:>7.4f} "
+                     f"{p:>9.4f}{marker} {leaderboard['wins'][i]:>5} {leaderboard['losses'][i]:>6}")
+    return "\n".join(lines)
+
+
+def benchmark(n_models=200, n_folds=50):
+    """Whole-matrix comparison vs one scipy ttest_rel call per pair (as in statistical_test)"""
+    import time
+    from scipy import stats
+
+    rng = np.random.default_rng(42)
+    fold_effect = rng.normal(0, 0.02, n_folds)    # shared fold difficulty makes scores correlated
+    scores = 0.8 + rng.normal(0, 0.01, (n_models, 1)) + fold_effect + rng.normal(0, 0.01, (n_models, n_folds))
+
+    start = time.perf_counter()
+    loop_p = np.zeros((n_models, n_models))
+    for i in range(n_models):
+        for j in range(i + 1, n_models):
+            loop_p[i, j] = loop_p[j, i] = stats.ttest_rel(scores[i], scores[j]).pvalue
+    slow = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, fast_p = corrected_ttest(scores, test_train_ratio=0.0)
+    result = compare_models(scores, n_splits=5)
+    fast = time.perf_counter() - start
+
+    off_diag = ~np.eye(n_models, dtype=bool)
+    print(f"--- Benchmark ({n_models} models × {n_folds} folds, {n_models * (n_models - 1) // 2:,} pairs) ---")
+    print(f"scipy ttest_rel per pair:  {slow:.2f} s")
+    print(f"Vectorized (+ corrected t, Holm, leaderboard): {fast * 1000:.1f} ms ({slow / fast:.0f}x)")
+    print(f"Max |p - scipy p| (uncorrected): {np.abs(fast_p - loop_p)[off_diag].max():.2e}")
+    return result
+
+
+if __name__ == "__main__":
+    print("=== Vectorized Model Comparison ===\n")
+    rng = np.random.default_rng(0)
+
+    # 10 repeats of 5-fold CV for 8 models with a shared per-fold difficulty
+    n_models, n_folds = 8, 50
+    true_means = np.linspace(0.80, 0.84, n_models)
+    scores = true_means[:, None] + rng.normal(0, 0.015, n_folds) + rng.normal(0, 0.01, (n_models, n_folds))
+    result = compare_models(scores, names=[f"model_{i}" for i in range(n_models)], n_splits=5)
+    print(format_leaderboard(result["leaderboard"]))
+    print("(* = significantly worse than the best model after Holm correction)\n")
+
+    # McNemar from out-of-fold predictions cached as a (models × samples) matrix
+    y_true = rng.integers(0, 2, 10_000)
+    accuracy = np.array([0.80, 0.81, 0.85])
+    predictions = np.where(rng.random((3, 10_000)) < accuracy[:, None], y_true, 1 - y_true)
+    statistic, p, _ = mcnemar_tests(predictions, y_true)
+    print("McNemar p-values (accuracy 0.80 / 0.81 / 0.85):")
+    print(np.array2string(p, precision=4))
+    print()
+
+    benchmark()
@@ -0,0 +1,419 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+from importlib import metadata
+
+import numpy as np
+
+try:                                    # optional: ~10x faster than sha256 when installed
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CHUNK_BYTES = 1 << 24
+
+
+def _hasher():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.sha256()
+
+
+def hash_array(array, chunk_bytes=CHUNK_BYTES):
+    """Digest of an array's dtype, shape and contents, read `chunk_bytes` at a time
+
+    Contiguous arrays and memmaps are hashed straight from their buffer,
+    so a memory-mapped file is paged in chunk by chunk and never copied.
+    Other layouts are copied a block of rows at a time. Bytes are read
+    through a uint8 view, since dtypes such as datetime64 cannot be
+    exported as a buffer.
+    """
+    array = np.asarray(array)
+    digest = _hasher()
+    digest.update(f"{array.dtype.str}|{array.shape}|".encode())
+    if array.dtype.hasobject:
+        digest.update(pickle.dumps(array.tolist(), protocol=5))
+    elif array.flags.c_contiguous:
+        buffer = array.reshape(-1).view(np.uint8)
+        for start in range(0, len(buffer), chunk_bytes):
+            digest.update(buffer[start:start + chunk_bytes])
+    else:
+        rows = max(1, chunk_bytes // max(1, array[:1].nbytes))
+        for start in range(0, len(array), rows):
+            digest.update(np.ascontiguousarray(array[start:start + rows]).reshape(-1).view(np.uint8))
+    return digest.hexdigest()
+
+
+def hash_file(path, chunk_bytes=CHUNK_BYTES):
+    """Digest of a file's contents; `.npy` files hash like the array they hold"""
+    if str(path).endswith(".npy"):
+        return hash_array(np.load(path, mmap_mode="r"), chunk_bytes)
+    digest = _hasher()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+PLAIN_TYPES = {str, bytes, int, float, bool, type(None)}
+
+
+def _plain_sequence(items):
+    """True for non-empty lists of scalars/strings, or of lists of them, where no string names a file
+
+    Each distinct string is checked once, so a tokenized corpus costs one
+    stat per vocabulary word.
+    """
+    if not items:
+        return False
+    kinds = {type(item) for item in items}
+    if kinds <= PLAIN_TYPES:
+        flat = items
+    elif kinds <= {list, tuple}:
+        flat = [x for inner in items for x in inner]
+        if not {type(x) for x in flat} <= PLAIN_TYPES:
+            return False
+    else:
+        return False
+    return not any(os.path.isfile(x) for x in {x for x in flat if type(x) is str})
+
+
+def _code_key(code):
+    """Bytecode, constants and names of a code object, nested functions included"""
+    consts = tuple(_code_key(c) if isinstance(c, types.CodeType) else c for c in code.co_consts)
+    return (code.co_code, consts, code.co_names)
+
+
+def _cell_value(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:                  # a closure variable not yet assigned
+        return None
+
+
+def _feed_pandas(obj, feed):
+    """DataFrame, Series or Index contents without importing pandas: values per column, index, names"""
+    kind = type(obj).__name__
+    if hasattr(obj, "columns"):
+        columns = [obj.iloc[:, i].to_numpy() for i in range(obj.shape[1])]
+        feed((kind, list(obj.columns), columns, obj.index))
+    elif hasattr(obj, "index"):
+        feed((kind, obj.name, obj.to_numpy(), obj.index))
+    else:
+        feed((kind, list(obj.names), obj.to_numpy()))
+
+
+def hash_value(value, file_hash=hash_file):
+    """Stable digest of metric inputs or parameters: arrays, file paths, containers and scalars
+
+    Lists of plain values, or of lists of them (e.g. tokenized
+    sentences), are pickled and hashed in one call, not item by item.
+    Python functions are keyed by their code, defaults and closure
+    values as well as their name, so two lambdas never share a key.
+    pandas objects hash their values, index and column names. Any other
+    object is pickled; one that cannot be pickled raises TypeError rather
+    than being keyed by its repr, which may be truncated or hold an address.
+    """
+    digest = _hasher()
+    functions = set()
+
+    def feed(obj):
+        if isinstance(obj, np.ndarray):
+            digest.update(b"a" + hash_array(obj).encode())
+        elif isinstance(obj, os.PathLike) or (isinstance(obj, str) and os.path.isfile(obj)):
+            digest.update(b"f" + file_hash(os.fspath(obj)).encode())
+        elif isinstance(obj, dict):
+            digest.update(b"{")
+            for key in sorted(obj, key=repr):
+                feed(key)
+                feed(obj[key])
+            digest.update(b"}")
+        elif isinstance(obj, (list, tuple)) and _plain_sequence(obj):
+            digest.update(b"p" + hashlib.sha256(pickle.dumps(obj, protocol=5)).digest())
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b"[")
+            for item in obj:
+                feed(item)
+            digest.update(b"]")
+        elif isinstance(obj, (set, frozenset)):
+            feed(sorted(obj, key=repr))
+        elif isinstance(obj, functools.partial):
+            feed((obj.func, obj.args, obj.keywords))
+        elif isinstance(obj, types.FunctionType):
+            digest.update(f"c{obj.__module__}.{obj.__qualname__}|".encode())
+            if id(obj) not in functions:               # a recursive closure refers back to itself
+                functions.add(id(obj))
+                cells = [_cell_value(cell) for cell in obj.__closure__ or ()]
+                feed((_code_key(obj.__code__), obj.__defaults__, obj.__kwdefaults__, cells))
+        elif isinstance(obj, types.MethodType):
+            feed((obj.__func__, obj.__self__))
+        elif callable(obj) and hasattr(obj, "__qualname__"):      # classes, builtins, ufuncs
+            digest.update(f"c{getattr(obj, '__module__', '')}.{obj.__qualname__}|".encode())
+        elif type(obj) in PLAIN_TYPES or isinstance(obj, np.generic):
+            digest.update(f"{type(obj).__name__}:{obj!r}|".encode())
+        elif type(obj).__module__.startswith("pandas") and hasattr(obj, "to_numpy"):
+            _feed_pandas(obj, feed)
+        else:
+            try:
+                data = pickle.dumps(obj, protocol=5)
+            except Exception as exc:
+                raise TypeError(f"Cannot build a cache key from {type(obj).__name__}: {exc}") from None
+            digest.update(b"o" + hashlib.sha256(data).digest())
+
+    feed(value)
+    return digest.hexdigest()
+
+
+def default_version():
+    """Versions that change metric results: Python, numpy, scikit-learn (when installed)"""
+    versions = [f"python={sys.version_info.major}.{sys.version_info.minor}"]
+    for package in ("numpy", "scikit-learn"):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            pass
+    return ",".join(versions)
+
+
+_MISSING = object()
+
+
+class ResultCache:
+    """Disk-backed, content-addressed cache of metric results shared by several processes
+
+    A key is the digest of the metric name, its parameters, the contents
+    of its input arrays or files, and a version string (library versions
+    by default; bump it when metric code changes). Values are pickled to
+    their own files, written to a temporary name and renamed into place,
+    so readers never see a partial value. A SQLite index (WAL mode, with
+    a busy timeout) records sizes and last-access times across processes,
+    and the least recently used entries are evicted once the cache holds
+    more than `max_bytes` or `max_entries`. Two processes missing the same
+    key at once both compute it, and the second write replaces the first
+    with an identical value.
+
+    File inputs are re-hashed only when their size or mtime changes; the
+    digest is remembered per (path, size, mtime).
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30, max_entries=None, version=None):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.version = default_version() if version is None else version
+        self.hits = self.misses = 0
+        self._connection = None
+        self._pid = None
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        with self._db() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, metric TEXT, "
+                       "size INTEGER, created REAL, accessed REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS by_access ON entries (accessed)")
+            db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                       "mtime_ns INTEGER, digest TEXT)")
+
+    def _db(self):
+        """This process's SQLite connection (reopened after a fork)"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30,
+                                               isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):                    # connections do not pickle; workers open their own
+        return {**self.__dict__, "_connection": None, "_pid": None}
+
+    def _path(self, key):
+        return os.path.join(self.directory, "objects", key[:2], key + ".pkl")
+
+    def file_digest(self, path):
+        """hash_file(path), reused while the file's size and mtime are unchanged"""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        db = self._db()
+        row = db.execute("SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                         (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+        digest = hash_file(path)
+        db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def key(self, metric, inputs=(), params=None):
+        """Cache key for `metric` on these inputs (arrays, paths, ...) with these parameters"""
+        return hash_value([metric, self.version, inputs, params or {}], file_hash=self.file_digest)
+
+    def get(self, key, default=None):
+        db = self._db()
+        row = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))     # evicted or damaged meanwhile
+            else:
+                db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key, value, metric=""):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as f:
+            pickle.dump(value, f, protocol=5)
+            size = f.tell()
+        os.replace(f.name, path)
+        now = time.time()
+        self._db().execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", (key, metric, size, now, now))
+        self._evict()
+        return value
+
+    def _evict(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")              # one process evicts at a time
+        try:
+            count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            victims = []
+            for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                if total <= self.max_bytes and (self.max_entries is None or count <= self.max_entries):
+                    break
+                victims.append(key)
+                total -= size
+                count -= 1
+            db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self, metric, fn, inputs=(), params=None):
+        """fn(*inputs, **params), computed once per distinct (metric, inputs, params, version)"""
+        key = self.key(metric, inputs, params)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.set(key, fn(*inputs, **(params or {})), metric)
+        return value
+
+    def memoize(self, fn=None, *, metric=None):
+        """Decorator: cache calls to `fn` keyed by all of its arguments"""
+        if fn is None:
+            return functools.partial(self.memoize, metric=metric)
+        name = metric or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self.get_or_compute(name, fn, args, kwargs)
+        return wrapper
+
+    def stats(self):
+        count, total = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        db = self._db()
+        keys = [row[0] for row in db.execute("SELECT key FROM entries")]
+        db.execute("DELETE FROM entries")
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+def _roc_and_report(path):
+    from sklearn.metrics import classification_report, roc_curve
+    y_true, y_score = np.load(path, mmap_mode="r")
+    fpr, tpr, thresholds = roc_curve(y_true, y_score)
+    return fpr, tpr, classification_report(y_true, (y_score > 0.5).astype(int))
+
+
+def _worker_lookup(args):
+    cache, path = args
+    return cache.get_or_compute("roc_report", _roc_and_report, (path,))[2]
+
+
+def benchmark(n_rows=100_000_000):
+    """Hashing throughput over a memory-mapped file, cold and with the (size, mtime) memo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scores.npy")
+        np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n_rows,))[:] = 0.5
+        cache = ResultCache(os.path.join(tmp, "cache"))
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        cache.key("metric", (path,))
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.key("metric", (path,))
+        memo = time.perf_counter() - start
+        in_memory = np.load(path)
+        start = time.perf_counter()
+        cache.key("metric", (in_memory,))
+        array = time.perf_counter() - start
+
+    print(f"--- Benchmark ({size / 1024 ** 2:.0f} MB .npy, {'xxh3' if xxhash else 'sha256'}) ---")
+    print(f"Key from memory-mapped file: {cold:.2f} s ({size / cold / 1e9:.1f} GB/s)")
+    print(f"Key from in-memory array:    {array:.2f} s")
+    print(f"Key for the unchanged file:  {memo * 1000:.2f} ms (size/mtime memo)")
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    print("=== Content-Addressed Result Cache ===\n")
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(os.path.join(tmp, "cache"), max_bytes=256 * 1024 ** 2)
+
+        # Classification: roc_curve + classification_report on a memory-mapped prediction file
+        n = 5_000_000
+        y_true = rng.integers(0, 2, n)
+        path = os.path.join(tmp, "predictions.npy")
+        np.save(path, np.stack([y_true, np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1)]))
+        print(f"--- roc_curve + classification_report ({n:,} rows) ---")
+        for attempt in ("first run", "re-run"):
+            start = time.perf_counter()
+            cache.get_or_compute("roc_report", _roc_and_report, (path,))
+            print(f"{attempt:>9}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        # CV folds and n-gram counting, memoized by their arguments
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nlp"))
+        from cross_validation import cross_validate_mock
+        from corpus_metrics import CorpusScorer, mock_corpus
+
+        X = rng.standard_normal((200_000, 20))
+        y = (X[:, 0] > 0).astype(int)
+        cached_cv = cache.memoize(cross_validate_mock, metric="cross_validate_mock")
+        references, candidates = mock_corpus(50_000)
+        cached_bleu = cache.memoize(lambda refs, cands: CorpusScorer(refs).score(cands)["bleu"], metric="corpus_bleu")
+        for name, call in (("cross_validate_mock", partial(cached_cv, X, y, n_splits=5, n_repeats=3, n_workers=1)),
+                           ("corpus BLEU (n-gram counts)", partial(cached_bleu, references, candidates))):
+            print(f"\n--- {name} ---")
+            for attempt in ("first run", "re-run"):
+                start = time.perf_counter()
+                call()
+                print(f"{attempt:>9}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+        print("\n(a file path is re-hashed only when its size or mtime changes; arrays are hashed on every call)")
+
+        # Four processes read the same entry concurrently
+        with ProcessPoolExecutor(4) as pool:
+            reports = list(pool.map(_worker_lookup, [(cache, path)] * 8))
+        print(f"\n8 lookups from 4 processes agree: {len(set(reports)) == 1}")
+        print(f"Cache: {cache.stats()}\n")
+
+    benchmark()